@@ -0,0 +1,218 @@
+import copy
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from fundamentals_cache import FUNDAMENTAL_FIELDS
+from indicators import compute_indicators, rolling_moments, rolling_sum
+from stats_engine import TRADING_DAYS
+from strategies import OPERATORS, dip_bargains
+
+# Point-in-time backtest of a screen. Every price feature is computed once for every day of
+# the panel using only data up to that day (rolling windows via cumulative sums, indicators
+# from indicators.compute_indicators, drawdown over the same trailing `lookback` window from
+# a sliding-window view), then all rebalance dates are scored at once as a rebalance-date x
+# ticker matrix. Nothing is re-run per date. A ticker stops being a candidate, and stops
+# counting towards the universe return, after its last close.
+#
+# Only prices have history here. Fundamentals are a single current snapshot, so passing them
+# in broadcasts today's FUNDAMENTAL_FIELDS values to every date (look-ahead bias); without
+# them, components that need fundamentals (quality, value, the PE filter) are dropped from
+# the strategy. Price columns of the snapshot are never broadcast.
+
+LOOKBACK_DAYS = 252
+DRAWDOWN_BLOCK = 2 ** 24  # window values rolling_drawdown holds at once
+FREQUENCIES = {"monthly": "M", "weekly": "W"}
+
+
+def rebalance_dates(index, frequency="monthly", warmup=LOOKBACK_DAYS):
+    # Last trading day of each month/week, once `warmup` days of history exist
+    dates = pd.Series(index[warmup:], index=index[warmup:])
+    return pd.DatetimeIndex(dates.groupby(dates.index.to_period(FREQUENCIES[frequency])).max().values)
+
+
+def rolling_drawdown(closes, rows, lookback):
+    # Max drawdown inside the trailing `lookback` closes ending at each of `rows`. The panel
+    # is NaN-padded in front so every row has a full window in the (row, ticker, day)
+    # sliding view; rows are taken in blocks of about DRAWDOWN_BLOCK values.
+    padded = np.vstack([np.full((lookback - 1, closes.shape[1]), np.nan), closes])
+    windows = sliding_window_view(padded, lookback, axis=0)
+    out = np.full((len(rows), closes.shape[1]), np.nan)
+    step = max(1, DRAWDOWN_BLOCK // max(1, closes.shape[1] * lookback))
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for start in range(0, len(rows), step):
+            window = windows[rows[start:start + step]]
+            out[start:start + step] = np.nanmin(window / np.fmax.accumulate(window, axis=2) - 1, axis=2)
+    return out
+
+
+def trading(close_panel, dates):
+    # dates x ticker: True while the ticker still has a close on or after that date.
+    # Forward-filled closes would otherwise show a delisted name as a flat, zero-return stock.
+    valid = close_panel.notna().to_numpy()
+    last = len(valid) - 1 - np.argmax(valid[::-1], axis=0)
+    return close_panel.index.get_indexer(dates)[:, None] <= np.where(valid.any(axis=0), last, -1)[None, :]
+
+
+def point_in_time_features(close_panel, lookback=LOOKBACK_DAYS, benchmark_returns=None, dates=None):
+    """{feature: date x ticker frame} where each row only uses closes up to that date, for
+    `dates` (default: every day of the panel). Includes the indicators.INDICATORS columns,
+    and `beta` over `lookback` when benchmark returns are given."""
+    dates = close_panel.index if dates is None else pd.DatetimeIndex(dates)
+    rows = close_panel.index.get_indexer(dates)
+    closes = close_panel.ffill().to_numpy(dtype=np.float64)
+    returns = np.vstack([np.full((1, closes.shape[1]), np.nan), closes[1:] / closes[:-1] - 1])
+    s = rolling_sum(returns, lookback)
+    sq = rolling_sum(returns ** 2, lookback)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s / lookback
+        std = np.sqrt(np.maximum(sq - s * s / lookback, 0.0) / (lookback - 1))
+        values = {
+            "volatility": std * np.sqrt(TRADING_DAYS),
+            "sharpe": np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS), np.nan),
+            "momentum_1m": rolling_sum(returns, 20),
+            "momentum_3m": rolling_sum(returns, 62),
+        }
+    if benchmark_returns is not None:
+        bench = benchmark_returns.reindex(close_panel.index).to_numpy(dtype=np.float64)
+        values["beta"] = rolling_moments(returns, bench, lookback, lookback)[1]
+    values = {k: v[rows] for k, v in values.items()}
+    values["drawdown"] = rolling_drawdown(closes, rows, lookback)
+    values.update({k: v.to_numpy()[rows] for k, v in compute_indicators(close_panel, benchmark_returns).items()})
+    return {k: pd.DataFrame(v, index=dates, columns=close_panel.columns) for k, v in values.items()}
+
+
+def restrict(strategy, available):
+    # Drop every requirement, filter and component that needs a feature we do not have, and
+    # group-relative components (the cross-sectional scorer only does universe z-scores)
+    strategy = copy.deepcopy(strategy)
+    strategy.required = [c for c in strategy.required if c in available]
+    strategy.filters = [f for f in strategy.filters if f[0] in available]
+    strategy.components = {name: terms for name, terms in strategy.components.items()
+                           if all(column in available and kind in ('z', 'raw') for column, _, kind in terms)}
+    strategy.score_weights = {name: w for name, w in strategy.score_weights.items() if name in strategy.components}
+    strategy.display_columns = [c for c in strategy.display_columns if c in ('ticker', 'score') or c in available]
+    return strategy
+
+
+def cross_sectional_scores(features, strategy):
+    # features: {column: rebalance-date x ticker array}. Same math as score_strategy, with the
+    # candidate mask and z-scores taken per row (date) instead of per DataFrame.
+    shape = next(iter(features.values())).shape
+    mask = np.ones(shape, dtype=bool)
+    for column in strategy.required:
+        mask &= ~np.isnan(features[column])
+    with np.errstate(invalid="ignore"):
+        for column, op, threshold in strategy.filters:
+            mask &= OPERATORS[op](features[column], threshold)
+    count = mask.sum(axis=1, keepdims=True)
+    score = np.zeros(shape)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name, terms in strategy.components.items():
+            weight = strategy.score_weights.get(name, 0.0)
+            for column, coef, kind in terms:
+                values = np.where(mask, features[column], np.nan)
+                if kind == 'z':
+                    mean = np.nansum(values, axis=1, keepdims=True) / count
+                    std = np.sqrt(np.nansum((values - mean) ** 2, axis=1, keepdims=True) / (count - 1))
+                    values = (values - mean) / std
+                score = score + weight * coef * values
+    return np.where(mask, score, np.nan)
+
+
+def top_n_matrix(scores, top_n):
+    # Column positions of each row's top_n scores (best first); -1 pads rows with fewer candidates
+    ranked = np.where(np.isnan(scores), -np.inf, scores)
+    top_n = min(top_n, scores.shape[1])
+    top = np.argpartition(-ranked, top_n - 1, axis=1)[:, :top_n]
+    order = np.argsort(-np.take_along_axis(ranked, top, axis=1), axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    return np.where(np.isfinite(np.take_along_axis(ranked, top, axis=1)), top, -1)
+
+
+class BacktestResult:
+    def __init__(self, periods, picks):
+        self.periods = periods
+        self.picks = picks
+
+    def summary(self):
+        p = self.periods.dropna(subset=['portfolio_return'])
+        if p.empty:
+            return {"periods": 0}
+        per_year = len(p) / max((p.index[-1] - p.index[0]).days / 365.25, 1e-9) if len(p) > 1 else np.nan
+        growth = (1 + p['portfolio_return']).prod()
+        universe = (1 + p['universe_return']).prod()
+        return {
+            "periods": len(p),
+            "mean_return": p['portfolio_return'].mean(),
+            "mean_excess_return": (p['portfolio_return'] - p['universe_return']).mean(),
+            "cumulative_return": growth - 1,
+            "universe_cumulative_return": universe - 1,
+            "annualized_return": growth ** (per_year / len(p)) - 1 if per_year == per_year else np.nan,
+            "hit_rate": p['hit_rate'].mean(),
+            "mean_turnover": p['turnover'].mean(),
+        }
+
+
+def backtest(close_panel, strategy=None, fundamentals=None, frequency="monthly", top_n=10, lookback=LOOKBACK_DAYS,
+             benchmark_returns=None):
+    """Replay `strategy` (dip_bargains by default) at each rebalance date and hold an
+    equal-weight top_n portfolio until the next one. Reports per-period forward return of the
+    picks and of the equal-weight universe, hit rate (share of picks beating the universe)
+    and turnover (share of the portfolio replaced)."""
+    strategy = strategy or dip_bargains()
+    dates = rebalance_dates(close_panel.index, frequency, warmup=lookback)
+    alive = trading(close_panel, dates)
+    features = {k: np.where(alive, v.to_numpy(), np.nan)
+                for k, v in point_in_time_features(close_panel, lookback, benchmark_returns, dates).items()}
+    if fundamentals is not None:
+        snapshot = fundamentals.reindex(close_panel.columns)
+        for column in FUNDAMENTAL_FIELDS:
+            if column in snapshot:
+                values = pd.to_numeric(snapshot[column], errors='coerce').to_numpy(dtype=np.float64)
+                features[column] = np.broadcast_to(values, (len(dates), len(close_panel.columns)))
+    strategy = restrict(strategy, features)
+    top = top_n_matrix(cross_sectional_scores(features, strategy), top_n)
+
+    closes = close_panel.ffill().loc[dates].to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        forward = np.vstack([closes[1:] / closes[:-1] - 1, np.full((1, closes.shape[1]), np.nan)])
+    # A name delisted during a period keeps its return up to its last close; after that it is out
+    forward = np.where(alive, forward, np.nan)
+    held = top >= 0
+    picked = np.where(held, np.take_along_axis(forward, np.maximum(top, 0), axis=1), np.nan)
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        # The last rebalance date has no forward period yet
+        warnings.simplefilter("ignore", RuntimeWarning)
+        universe = np.nanmean(forward, axis=1)
+        portfolio = np.nanmean(picked, axis=1)
+        hits = np.nansum(picked > universe[:, None], axis=1) / (~np.isnan(picked)).sum(axis=1)
+
+    membership = np.zeros((len(dates), close_panel.shape[1]), dtype=bool)
+    rows = np.repeat(np.arange(len(dates)), top.shape[1])
+    membership[rows[held.ravel()], top.ravel()[held.ravel()]] = True
+    size = membership.sum(axis=1)
+    turnover = np.full(len(dates), np.nan)
+    if len(dates) > 1:
+        stayed = (membership[1:] & membership[:-1]).sum(axis=1)
+        turnover[1:] = 1 - stayed / np.maximum(size[1:], 1)
+
+    periods = pd.DataFrame({
+        "portfolio_return": portfolio, "universe_return": universe, "hit_rate": hits, "turnover": turnover,
+    }, index=dates)
+    tickers = close_panel.columns.to_numpy()
+    picks = pd.DataFrame(np.where(held, tickers[np.maximum(top, 0)], None), index=dates,
+                         columns=[f"rank_{i + 1}" for i in range(top.shape[1])])
+    return BacktestResult(periods, picks)
+
+
+if __name__ == "__main__":
+    from synthetic_data import synthetic_close_panel
+
+    # Synthetic 10-year x 500-ticker demo; pass a real cached panel for actual results
+    result = backtest(synthetic_close_panel(500, n_days=2520))
+    for key, value in result.summary().items():
+        print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+import time
+
+from export_qcom_data import export_ticker_report
+from report_export import export_bulk, export_excel
+from screening_engine import ScreeningEngine
+from market_data import PRICE_FIELDS
+from synthetic_data import ReplayMarket
+
+# Per-ticker export (export_qcom_data.py: download + .info + pd.ExcelWriter per ticker) vs
+# the batch exporters writing the same tickers from an already-built engine, on a replayed
+# synthetic market. LATENCY adds a simulated network round trip to every replayed call,
+# which only the per-ticker path pays at export time.
+# Usage: python bench_export.py [n_tickers ...]
+
+SIZES = [10, 100, 500]
+UNIVERSE = 500
+LATENCY = 0.0
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(n_tickers, engine, market, directory):
+    tickers = market.tickers[:n_tickers]
+    features = engine.build_feature_matrix()
+    per_ticker = timed(lambda: [export_ticker_report(t, os.path.join(directory, f"{t}_stock_report.xlsx"),
+                                                     download=market, ticker_factory=market.ticker)
+                                for t in tickers])
+    panels = {}
+    load = timed(lambda: panels.update(engine.price_cache.cached_panel(tickers, PRICE_FIELDS)))
+    excel = timed(lambda: export_excel(os.path.join(directory, "report.xlsx"), features, panels, tickers,
+                                       ohlcv_sheets=n_tickers))
+    csv = timed(lambda: export_bulk(os.path.join(directory, "csv"), features, panels, tickers, "csv"))
+    try:
+        parquet = f"{timed(lambda: export_bulk(os.path.join(directory, 'pq'), features, panels, tickers, 'parquet')):7.2f}s"
+    except ImportError:
+        parquet = "  (no pyarrow)"
+    print(f"{n_tickers:>5} tickers | per-ticker xlsx {per_ticker:7.2f}s | panel load {load:5.2f}s | "
+          f"batch xlsx {excel:6.2f}s ({per_ticker / (load + excel):5.1f}x) | csv {csv:5.2f}s | parquet {parquet}")
+
+
+if __name__ == "__main__":
+    market = ReplayMarket(UNIVERSE, latency=LATENCY, info_latency=LATENCY)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = ScreeningEngine(market.tickers, price_cache_dir=os.path.join(directory, "prices"),
+                                 fundamentals_cache=os.path.join(directory, "fundamentals.sqlite"),
+                                 requests_per_second=1e6, download=market, ticker_factory=market.ticker)
+        try:
+            for n in [int(a) for a in sys.argv[1:]] or SIZES:
+                run(min(n, UNIVERSE), engine, market, directory)
+        finally:
+            engine.close()
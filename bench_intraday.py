@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from intraday import TickFile
+from profiling import latency_summary
+from screening_engine import ScreeningEngine
+from strategies import dip_bargains
+from synthetic_data import ReplayMarket, synthetic_ticks
+
+# Intraday rescoring under a replayed full-universe tick load: the dip screen is built once
+# offline from a ReplayMarket, then ROUNDS last-price ticks per ticker (every ticker, not just
+# the candidates) are written to a tick file and replayed through IntradayScreen as fast as
+# they can be read. Reports per-tick update latency (tick in hand -> top-N updated and
+# published), throughput including the file read, and what a from-scratch rescore of the
+# strategy (run() on the held feature matrix) costs, which is what each tick would pay otherwise.
+# Usage: python bench_intraday.py [n_tickers ...]
+
+SIZES = [500, 5000, 20000]
+ROUNDS = 20
+VOLATILITY = 0.003
+
+
+def bench(n_tickers):
+    market = ReplayMarket(n_tickers)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = ScreeningEngine(market.tickers, price_cache_dir=os.path.join(directory, "prices"),
+                                 fundamentals_cache=os.path.join(directory, "fundamentals.sqlite"),
+                                 requests_per_second=1e6, download=market, ticker_factory=market.ticker)
+        try:
+            engine.run([dip_bargains()])
+            start = time.perf_counter()
+            engine.run([dip_bargains()])
+            rescore = time.perf_counter() - start
+        finally:
+            engine.close()
+        path = os.path.join(directory, "ticks.csv")
+        ticks = synthetic_ticks(engine.close_panel, rounds=ROUNDS, volatility=VOLATILITY)
+        ticks.to_csv(path, index=False)
+
+        published = []
+        start = time.perf_counter()
+        live = engine.intraday("dip_bargains", publish=published.append)
+        setup = time.perf_counter() - start
+        start = time.perf_counter()
+        live.run(TickFile(path))
+        wall = time.perf_counter() - start
+    report = live.report()
+    latency = report["latency"]
+    # Ticks for non-candidates are a dict miss; summarize the ones that rescored a ticker
+    applied = latency_summary(np.frombuffer(live.latencies)[ticks["ticker"].isin(live.tickers).to_numpy()])
+    print(f"{n_tickers:>6} tickers ({report['candidates']} candidates) | {len(ticks)} ticks in {wall:6.2f}s "
+          f"({len(ticks) / wall:9.0f}/s incl. file read) | setup {setup * 1e3:6.1f}ms | "
+          f"update p50 {applied['p50_s'] * 1e6:5.1f}us p95 {applied['p95_s'] * 1e6:5.1f}us "
+          f"max {latency['max_s'] * 1e6:7.1f}us | {report['top_n_changes']} top-N changes | "
+          f"full rescore {rescore * 1e3:6.1f}ms")
+    return report
+
+
+if __name__ == "__main__":
+    for n in [int(a) for a in sys.argv[1:]] or SIZES:
+        bench(n)
@@ -0,0 +1,114 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from profiling import RunProfile
+from screening_engine import ScreeningEngine
+from strategies import STRATEGIES
+from synthetic_data import ReplayMarket
+
+# End-to-end pipeline benchmark on synthetic universes served by ReplayMarket, so it runs
+# offline and repeatably. Each size is run twice against the same caches: "cold" (empty
+# price and fundamentals caches, everything fetched) and "warm" (everything cached). Stage
+# times come from the engine's RunProfile and are appended, one JSON line per run with the
+# current git commit, to RESULTS_FILE so runs on different commits can be compared.
+# Usage: python bench_pipeline.py [n_tickers ...]
+
+SIZES = [500, 5000, 20000]
+LATENCY = 0.0  # seconds per simulated yf.download call
+INFO_LATENCY = 0.0  # seconds per simulated Ticker.info call
+REQUESTS_PER_SECOND = 1e6  # the replay needs no rate limit; real runs use fetch_scheduler's
+FETCH_WORKERS = 8
+COMPUTE_WORKERS = 1
+RESULTS_FILE = "bench_results.jsonl"
+
+STAGES = {
+    "fetch": ["prices", "benchmark", "fundamentals"],
+    "features": ["price_features", "feature_store"],
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_once(market, directory, label):
+    profile = RunProfile()
+    engine = ScreeningEngine(market.tickers, price_cache_dir=os.path.join(directory, "prices"),
+                             fundamentals_cache=os.path.join(directory, "fundamentals.sqlite"),
+                             fetch_workers=FETCH_WORKERS, requests_per_second=REQUESTS_PER_SECOND,
+                             download=market, ticker_factory=market.ticker, compute_workers=COMPUTE_WORKERS,
+                             profile=profile)
+    try:
+        engine.build_feature_matrix()
+        engine.run([factory() for factory in STRATEGIES.values()])
+        engine.export(os.path.join(directory, "export"), format="csv")
+        report = engine.run_profile()
+    finally:
+        engine.close()
+    stages = report["stages"]
+    timings = {group: sum(stages.get(s, {}).get("wall_s", 0.0) for s in names) for group, names in STAGES.items()}
+    timings["score"] = sum(v["wall_s"] for k, v in stages.items() if k.startswith("score:"))
+    timings["export"] = stages["export"]["wall_s"]
+    timings["total"] = sum(timings.values())
+    return {
+        "run": label,
+        "stages_s": timings,
+        "detail": stages,
+        "calls": report["calls"],
+        "fundamentals_cache": report["counters"]["fundamentals_cache"],
+        "price_cache": report["counters"]["price_cache"],
+    }
+
+
+def previous(path, n_tickers, run):
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record["n_tickers"] == n_tickers and record["run"] == run:
+                last = record
+    return last
+
+
+def bench(n_tickers, results_file=RESULTS_FILE):
+    market = ReplayMarket(n_tickers, latency=LATENCY, info_latency=INFO_LATENCY)
+    base = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(), "n_tickers": n_tickers,
+            "latency_s": LATENCY, "info_latency_s": INFO_LATENCY, "python": platform.python_version(),
+            "numpy": np.__version__, "pandas": pd.__version__, "cpus": os.cpu_count()}
+    records = []
+    with tempfile.TemporaryDirectory() as directory:
+        for label in ("cold", "warm"):
+            record = dict(base, **run_once(market, directory, label))
+            before = previous(results_file, n_tickers, label)
+            with open(results_file, "a") as f:
+                f.write(json.dumps(record, default=float) + "\n")
+            report(record, before)
+            records.append(record)
+    return records
+
+
+def report(record, before):
+    line = " | ".join(f"{k} {v:7.2f}s" for k, v in record["stages_s"].items())
+    print(f"{record['n_tickers']:>6} tickers {record['run']:<4} | {line}")
+    if before:
+        delta = record["stages_s"]["total"] / before["stages_s"]["total"] - 1
+        print(f"{'':>6}              vs {before['commit']} ({before['timestamp']}): total {delta:+.1%}")
+
+
+if __name__ == "__main__":
+    for n in [int(a) for a in sys.argv[1:]] or SIZES:
+        bench(n)
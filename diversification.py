@@ -0,0 +1,100 @@
+import numpy as np
+
+# Correlation-aware top-N. The candidate return covariance comes from one matrix product of
+# the demeaned return block (numpy hands X.T @ X to BLAS syrk, which only forms one
+# triangle), optionally shrunk toward a scaled identity with the Ledoit-Wolf intensity. The
+# selector is greedy: each pick maximizes standardized score minus `penalty` times the
+# candidate's highest correlation with anything already picked, and that running maximum is
+# updated with one row of the matrix per pick, so selecting n of k costs O(n * k).
+
+CORRELATION_LOOKBACK = 252
+DIVERSIFICATION_PENALTY = 1.0  # score standard deviations given up per unit of correlation
+
+
+def demeaned_returns(close_panel, tickers, lookback=CORRELATION_LOOKBACK):
+    # Missing returns (before listing, or gaps) are set to the ticker's mean, i.e. they add
+    # nothing to its covariances
+    closes = close_panel[list(tickers)].ffill().iloc[-(lookback + 1):].to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = closes[1:] / closes[:-1] - 1
+    valid = ~np.isnan(returns)
+    counts = np.maximum(valid.sum(axis=0), 1)
+    mean = np.where(valid, returns, 0.0).sum(axis=0) / counts
+    return np.where(valid, returns - mean, 0.0)
+
+
+def covariance(x):
+    return x.T @ x / max(len(x) - 1, 1)
+
+
+def ledoit_wolf(x):
+    """(shrunk covariance, shrinkage intensity) of demeaned returns `x` (days x tickers),
+    shrinking toward mu * I with mu the average variance (Ledoit & Wolf, 2004)."""
+    n, p = x.shape
+    sample = x.T @ x / n
+    mu = np.trace(sample) / p
+    target_gap = sample.copy()
+    target_gap[np.diag_indices(p)] -= mu
+    d2 = np.sum(target_gap ** 2)
+    # sum_k ||x_k x_k' - S||_F^2 = sum_k ||x_k||^4 - n ||S||_F^2, without forming x_k x_k'
+    b2 = (np.sum(np.sum(x * x, axis=1) ** 2) / n - np.sum(sample ** 2)) / n
+    shrinkage = 0.0 if d2 == 0 else float(np.clip(b2 / d2, 0.0, 1.0))
+    shrunk = (1 - shrinkage) * sample
+    shrunk[np.diag_indices(p)] += shrinkage * mu
+    return shrunk, shrinkage
+
+
+def correlation(cov):
+    sd = np.sqrt(np.diag(cov))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.outer(sd, sd)
+    corr[np.isnan(corr)] = 0.0
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def greedy_diversified(scores, corr, n, penalty=DIVERSIFICATION_PENALTY):
+    # Positions of the picks in pick order, and each pick's max correlation with earlier ones
+    scores = np.asarray(scores, dtype=np.float64)
+    scored = ~np.isnan(scores)
+    if not scored.any():
+        return np.array([], dtype=int), np.array([])
+    std = scores[scored].std()
+    z = np.where(scored, (scores - scores[scored].mean()) / (std if std > 0 else 1.0), -np.inf)
+    n = min(n, len(scores))
+    max_corr = np.full(len(scores), -np.inf)
+    available = np.ones(len(scores), dtype=bool)
+    picks, overlap = [], []
+    for _ in range(n):
+        objective = np.where(available, z - penalty * np.maximum(max_corr, 0.0), -np.inf)
+        pick = int(np.argmax(objective))
+        if not np.isfinite(objective[pick]):
+            break
+        picks.append(pick)
+        overlap.append(max_corr[pick])
+        available[pick] = False
+        max_corr = np.maximum(max_corr, corr[pick])
+    return np.array(picks, dtype=int), np.where(np.isfinite(overlap), overlap, np.nan)
+
+
+def diversified_top(result, close_panel, top_n=None, penalty=DIVERSIFICATION_PENALTY, shrink=True,
+                    lookback=CORRELATION_LOOKBACK):
+    """Like `result.top`, but trading score against correlation with the names already
+    picked. Adds `max_corr` (the pick's highest correlation with an earlier pick)."""
+    candidates = result.candidates
+    tickers = candidates['ticker'].to_numpy()
+    priced = np.isin(tickers, close_panel.columns)
+    candidates = candidates[priced]
+    x = demeaned_returns(close_panel, candidates['ticker'], lookback)
+    cov = ledoit_wolf(x)[0] if shrink else covariance(x)
+    picks, overlap = greedy_diversified(candidates['score'].to_numpy(), correlation(cov),
+                                        top_n or result.strategy.top_n, penalty)
+    top = candidates.iloc[picks][result.strategy.display_columns].copy()
+    top['max_corr'] = overlap
+    return top
+
+
+def mean_pairwise_correlation(close_panel, tickers, lookback=CORRELATION_LOOKBACK):
+    corr = correlation(covariance(demeaned_returns(close_panel, tickers, lookback)))
+    upper = np.triu_indices(len(corr), k=1)
+    return float(corr[upper].mean()) if len(upper[0]) else np.nan
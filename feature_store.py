@@ -0,0 +1,190 @@
+import datetime
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Column-oriented feature snapshot: one preallocated array per numeric feature, an integer
+# ticker -> row index, a per-row validity bitmask (bit j set = numeric column j present) and
+# sector/industry stored as small integer codes plus a label table. A snapshot serializes to
+# a single file (JSON header + 64-byte aligned column blocks) that loads as memory maps, so
+# opening one costs a header parse regardless of how many tickers it holds.
+
+STORE_DIR = ".feature_store"
+MAGIC = b"FSTORE1\n"
+ALIGN = 64
+MAX_COLUMNS = 64  # one bit per numeric column in the uint64 row mask
+CODE_DTYPE = np.int16  # -1 = missing, like pandas.Categorical
+
+
+def aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+class FeatureStore:
+    """Features for a fixed list of tickers. `columns` lists the numeric features (float64
+    unless `dtypes` says otherwise, e.g. float32 for history snapshots), `categories` the
+    text features kept as codes."""
+
+    def __init__(self, tickers, columns, categories=(), dtypes=None):
+        self.tickers = list(tickers)
+        self.index = {ticker: row for row, ticker in enumerate(self.tickers)}
+        if len(self.index) != len(self.tickers):
+            raise ValueError("Duplicate tickers in feature store")
+        if len(columns) > MAX_COLUMNS:
+            raise ValueError(f"At most {MAX_COLUMNS} numeric columns, got {len(columns)}")
+        dtypes = dtypes or {}
+        n = len(self.tickers)
+        self.columns = {c: np.full(n, np.nan, dtype=dtypes.get(c, np.float64)) for c in columns}
+        self.bits = {c: np.uint64(1) << np.uint64(j) for j, c in enumerate(self.columns)}
+        self.mask = np.zeros(n, dtype=np.uint64)
+        self.codes = {c: np.full(n, -1, dtype=CODE_DTYPE) for c in categories}
+        self.labels = {c: [] for c in categories}
+        self._label_index = {c: {} for c in categories}
+
+    def __len__(self):
+        return len(self.tickers)
+
+    @classmethod
+    def from_records(cls, tickers, records, columns, categories=(), dtypes=None):
+        # records: one feature dict per ticker, in `tickers` order
+        store = cls(tickers, columns, categories, dtypes)
+        for row, record in enumerate(records):
+            store.set_row(row, record)
+        return store
+
+    @classmethod
+    def from_frame(cls, frame, ticker_column='ticker', categories=(), dtypes=None):
+        columns = [c for c in frame.columns if c != ticker_column and c not in categories]
+        store = cls(frame[ticker_column], columns, categories, dtypes)
+        for column in columns:
+            store.set_column(column, frame[column])
+        for column in categories:
+            store.set_categories(column, frame[column])
+        return store
+
+    def set_row(self, row, record):
+        for column, values in self.columns.items():
+            value = pd.to_numeric(record.get(column, np.nan), errors='coerce')
+            values[row] = value
+            if value == value:
+                self.mask[row] |= self.bits[column]
+            else:
+                self.mask[row] &= ~self.bits[column]
+        for column in self.codes:
+            self.codes[column][row] = self._code(column, record.get(column))
+
+    def set_column(self, column, values):
+        values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=self.columns[column].dtype)
+        self.columns[column][:] = values
+        bit = self.bits[column]
+        self.mask = np.where(np.isnan(values), self.mask & ~bit, self.mask | bit)
+
+    def set_categories(self, column, values):
+        codes, labels = pd.factorize(pd.Series(values, dtype=object))
+        self.labels[column] = [str(label) for label in labels]
+        self._label_index[column] = {label: code for code, label in enumerate(self.labels[column])}
+        self.codes[column] = codes.astype(CODE_DTYPE)
+
+    def _code(self, column, value):
+        if not isinstance(value, str) or not value:
+            return -1
+        index = self._label_index[column]
+        if value not in index:
+            index[value] = len(self.labels[column])
+            self.labels[column].append(value)
+        return index[value]
+
+    def valid(self, required):
+        """Rows with every column in `required` present: one AND + compare per row."""
+        bits = np.uint64(0)
+        valid = np.ones(len(self), dtype=bool)
+        for column in required:
+            if column in self.codes:
+                valid &= self.codes[column] >= 0
+            else:
+                bits |= self.bits[column]
+        return valid & ((self.mask & bits) == bits)
+
+    def categorical(self, column):
+        return pd.Categorical.from_codes(self.codes[column], categories=self.labels[column])
+
+    def to_frame(self, columns=None):
+        # Numeric columns are views of the store's arrays (no copy), categories are Categoricals
+        # over the stored codes
+        columns = list(self.columns) + list(self.codes) if columns is None else columns
+        data = {'ticker': self.tickers}
+        for column in columns:
+            data[column] = self.columns[column] if column in self.columns else self.categorical(column)
+        return pd.DataFrame(data, copy=False)
+
+    def save(self, path):
+        blocks = [("mask", self.mask)] + [(f"column:{c}", v) for c, v in self.columns.items()] \
+            + [(f"codes:{c}", v) for c, v in self.codes.items()]
+        header = {"tickers": self.tickers, "labels": self.labels, "blocks": []}
+        offset = 0
+        for name, values in blocks:
+            header["blocks"].append({"name": name, "dtype": values.dtype.str, "offset": offset})
+            offset = aligned(offset + values.nbytes)
+        raw = json.dumps(header).encode()
+        start = aligned(len(MAGIC) + 8 + len(raw))
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + len(raw).to_bytes(8, "little") + raw)
+            for (name, values), block in zip(blocks, header["blocks"]):
+                f.seek(start + block["offset"])
+                f.write(np.ascontiguousarray(values).tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a saved snapshot. With `mmap` the arrays are read-only memory maps of the file,
+        so only the pages a screen actually touches are read."""
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a feature store snapshot")
+            size = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(size))
+        start = aligned(len(MAGIC) + 8 + size)
+        n = len(header["tickers"])
+        raw = np.memmap(path, dtype=np.uint8, mode="r") if mmap else np.fromfile(path, dtype=np.uint8)
+        arrays = {}
+        for block in header["blocks"]:
+            dtype = np.dtype(block["dtype"])
+            begin = start + block["offset"]
+            arrays[block["name"]] = raw[begin:begin + n * dtype.itemsize].view(dtype)
+        store = cls.__new__(cls)
+        store.tickers = header["tickers"]
+        store.index = {ticker: row for row, ticker in enumerate(store.tickers)}
+        store.mask = arrays["mask"]
+        store.columns = {name.split(":", 1)[1]: v for name, v in arrays.items() if name.startswith("column:")}
+        store.bits = {c: np.uint64(1) << np.uint64(j) for j, c in enumerate(store.columns)}
+        store.codes = {name.split(":", 1)[1]: v for name, v in arrays.items() if name.startswith("codes:")}
+        store.labels = header["labels"]
+        store._label_index = {c: {label: i for i, label in enumerate(labels)} for c, labels in store.labels.items()}
+        return store
+
+
+def snapshot_path(directory=STORE_DIR, date=None):
+    date = date or datetime.date.today()
+    return Path(directory) / f"features_{pd.Timestamp(date):%Y%m%d}.fstore"
+
+
+def save_snapshot(store, directory=STORE_DIR, date=None):
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    path = snapshot_path(directory, date)
+    store.save(path)
+    return path
+
+
+def load_snapshot(directory=STORE_DIR, date=None, mmap=True):
+    # The snapshot for `date`, or the most recent one
+    if date is not None:
+        return FeatureStore.load(snapshot_path(directory, date), mmap=mmap)
+    snapshots = sorted(Path(directory).glob("features_*.fstore"))
+    if not snapshots:
+        raise FileNotFoundError(f"No feature snapshots in {directory}")
+    return FeatureStore.load(snapshots[-1], mmap=mmap)
@@ -0,0 +1,100 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 4.0
+BURST = 8
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+THROTTLE_MARKERS = ("429", "too many requests", "rate limit")
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+
+
+def is_throttled(error):
+    # yfinance raises YFRateLimitError; plain HTTP clients surface a 429 in the message
+    text = f"{type(error).__name__} {error}".lower().replace("ratelimit", "rate limit")
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    """Global request rate limit shared by every worker thread."""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+class FetchScheduler:
+    """Runs per-ticker fetches on a bounded thread pool. `throttled` wraps the function that
+    actually hits the network with the token bucket and exponential backoff on throttling;
+    `map` returns results in input order and records failures instead of raising."""
+
+    def __init__(self, max_workers=MAX_WORKERS, rate=REQUESTS_PER_SECOND, burst=BURST, max_retries=MAX_RETRIES,
+                 backoff=BACKOFF_SECONDS, max_backoff=MAX_BACKOFF_SECONDS, sleep=time.sleep):
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate, burst, sleep=sleep)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sleep = sleep
+        self.failures = {}
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def throttled(self, fn):
+        def call(*args, **kwargs):
+            for attempt in range(self.max_retries + 1):
+                self.bucket.acquire()
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    if attempt == self.max_retries or not (is_throttled(e) or isinstance(e, TRANSIENT_ERRORS)):
+                        raise
+                with self._lock:
+                    self.retries += 1
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                self.sleep(delay * random.uniform(0.5, 1.0))
+        return call
+
+    def map(self, fn, items, key=str, default=None, max_workers=None):
+        items = list(items)
+
+        def run(item):
+            try:
+                return fn(item)
+            except Exception as e:
+                with self._lock:
+                    self.failures[key(item)] = f"{type(e).__name__}: {e}"
+                return default
+
+        workers = max_workers or self.max_workers
+        if workers <= 1 or len(items) <= 1:
+            return [run(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(run, items))
+
+    def report(self):
+        lines = [f"Fetch failures: {len(self.failures)} ({self.retries} retries after throttling/transient errors)"]
+        lines += [f"  {k}: {v}" for k, v in sorted(self.failures.items())]
+        return "\n".join(lines)
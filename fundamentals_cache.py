@@ -0,0 +1,150 @@
+import sqlite3
+import threading
+import time
+
+import yfinance as yf
+import pandas as pd
+import numpy as np
+
+CACHE_PATH = ".fundamentals_cache.sqlite"
+MAX_TICKERS = 5000
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+# Feature name -> yf.Ticker(...).info key. Only these fields are ever stored.
+FUNDAMENTAL_FIELDS = {
+    "pe": "trailingPE",
+    "roe": "returnOnEquity",
+    "debt_equity": "debtToEquity",
+    "insider_own": "heldPercentInsiders",
+    "revenue_growth": "revenueGrowth",
+    "eps_growth": "earningsGrowth",
+}
+
+# Text fields kept alongside, used to group tickers (sector-relative scoring)
+CATEGORY_FIELDS = {
+    "sector": "sector",
+    "industry": "industry",
+}
+
+CACHED_FIELDS = {**FUNDAMENTAL_FIELDS, **CATEGORY_FIELDS}
+
+# trailingPE moves with the price; the rest only change with filings
+FIELD_TTL = {
+    "pe": 4 * HOUR,
+    "roe": DAY,
+    "debt_equity": DAY,
+    "insider_own": WEEK,
+    "revenue_growth": WEEK,
+    "eps_growth": WEEK,
+    "sector": WEEK,
+    "industry": WEEK,
+}
+MAX_IDLE = 30 * DAY  # tickers no screen has read for this long are evicted
+
+
+def parse_info(info):
+    values = {name: pd.to_numeric(info.get(key, np.nan), errors='coerce') for name, key in FUNDAMENTAL_FIELDS.items()}
+    for name, key in CATEGORY_FIELDS.items():
+        value = info.get(key)
+        values[name] = value if isinstance(value, str) and value else None
+    return values
+
+
+def empty_fundamentals():
+    return {**{k: np.nan for k in FUNDAMENTAL_FIELDS}, **{k: None for k in CATEGORY_FIELDS}}
+
+
+class FundamentalsCache:
+    """SQLite cache of the fundamentals the scorers use, one row per (ticker, field) with its
+    fetch time. A ticker's `.info` is only requested when one of the fields the caller needs
+    is older than that field's TTL (or `refresh` is set); one call refreshes every field.
+    evict() drops tickers not read for `max_idle` seconds, which is how delisted symbols
+    drop out, and the least recently used ones beyond `max_tickers`.
+    `throttle` wraps the network call (e.g. `FetchScheduler.throttled`), so cache hits are
+    never rate limited."""
+
+    def __init__(self, path=CACHE_PATH, ttl=None, max_tickers=MAX_TICKERS, ticker_factory=None, clock=time.time,
+                 throttle=None, max_idle=MAX_IDLE):
+        self.ttl = dict(FIELD_TTL, **(ttl or {}))
+        self.max_tickers = max_tickers
+        self.max_idle = max_idle
+        self.ticker_factory = ticker_factory or yf.Ticker
+        self.clock = clock
+        self.fetch_info = throttle(self._fetch_info) if throttle else self._fetch_info
+        self.info_calls = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # `value` has no declared type: it holds the numeric fundamentals and the category
+        # text as given. Caches from before had a REAL column and are copied over once.
+        legacy = self._db.execute(
+            "SELECT type FROM pragma_table_info('fundamentals') WHERE name = 'value'").fetchone() == ("REAL",)
+        if legacy:
+            self._db.execute("ALTER TABLE fundamentals RENAME TO fundamentals_real")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS fundamentals (
+                ticker TEXT NOT NULL, field TEXT NOT NULL, value, fetched_at REAL NOT NULL,
+                PRIMARY KEY (ticker, field));
+            CREATE TABLE IF NOT EXISTS access (ticker TEXT PRIMARY KEY, last_access REAL NOT NULL);
+        """)
+        if legacy:
+            self._db.executescript("""
+                INSERT INTO fundamentals SELECT * FROM fundamentals_real;
+                DROP TABLE fundamentals_real;
+            """)
+
+    def get(self, ticker, refresh=False, fields=None):
+        # `fields`: the CACHED_FIELDS names that must be fresh (default all). The others come
+        # back as cached, however old, or empty if never fetched.
+        fields = CACHED_FIELDS if fields is None else fields
+        now = self.clock()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT field, value, fetched_at FROM fundamentals WHERE ticker = ?", (ticker,)).fetchall()
+            self._db.execute("INSERT OR REPLACE INTO access VALUES (?, ?)", (ticker, now))
+        cached = {field: (value, fetched_at) for field, value, fetched_at in rows}
+        fresh = not refresh and all(
+            field in cached and now - cached[field][1] < self.ttl[field] for field in fields)
+        if fresh:
+            with self._lock:
+                self.hits += 1
+            values = empty_fundamentals()
+            values.update({field: value for field, (value, _) in cached.items() if field in CACHED_FIELDS})
+            return {field: np.nan if value is None and field in FUNDAMENTAL_FIELDS else value
+                    for field, value in values.items()}
+
+        values = parse_info(self.fetch_info(ticker))
+        with self._lock:
+            self.misses += 1
+        rows = [(ticker, field, None if pd.isna(value) else float(value), now) for field, value in values.items()
+                if field in FUNDAMENTAL_FIELDS]
+        rows += [(ticker, field, values[field], now) for field in CATEGORY_FIELDS]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO fundamentals VALUES (?, ?, ?, ?)", rows)
+            self._db.commit()
+        return values
+
+    def _fetch_info(self, ticker):
+        with self._lock:
+            self.info_calls += 1
+        return self.ticker_factory(ticker).info
+
+    def evict(self):
+        with self._lock:
+            cutoff = self.clock() - self.max_idle
+            stale = [t for i, (t, last_access) in enumerate(self._db.execute(
+                "SELECT ticker, last_access FROM access ORDER BY last_access DESC"))
+                if i >= self.max_tickers or last_access < cutoff]
+            self._db.executemany("DELETE FROM fundamentals WHERE ticker = ?", [(t,) for t in stale])
+            self._db.executemany("DELETE FROM access WHERE ticker = ?", [(t,) for t in stale])
+            self._db.commit()
+        return stale
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Group-relative standardization (e.g. PE against the ticker's sector) for the whole universe
+# at once. Groups are factorized to integer codes and every per-group statistic is a
+# segmented reduction (np.bincount, or one lexsort for order statistics), so the cost is
+# O(n log n) regardless of how many groups there are.
+
+MIN_GROUP_SIZE = 3  # smaller groups (and unknown sectors) fall back to universe-wide stats
+WINSOR_LIMIT = 0.05
+METHODS = ("z", "rank", "winsor")
+
+
+def group_codes(groups):
+    codes, labels = pd.factorize(pd.Series(groups).astype(object).where(pd.notna(groups), None), sort=True)
+    return codes, len(labels)
+
+
+def group_moments(values, codes, n_groups):
+    valid = ~np.isnan(values) & (codes >= 0)
+    c = np.where(valid, codes, 0)
+    x = np.where(valid, values, 0.0)
+    count = np.bincount(c, weights=valid, minlength=n_groups)
+    total = np.bincount(c, weights=x, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        dev = np.where(valid, values - mean[c], 0.0)
+        std = np.sqrt(np.bincount(c, weights=dev * dev, minlength=n_groups) / (count - 1))
+    return count, mean, std
+
+
+def sorted_segments(values, codes, n_groups):
+    # One lexsort by (group, value): returns the order, each row's rank within its group and
+    # each group's start offset and size in that order. NaNs and unknown groups sort last.
+    valid = ~np.isnan(values) & (codes >= 0)
+    key_group = np.where(valid, codes, n_groups)
+    order = np.lexsort((np.where(valid, values, np.inf), key_group))
+    size = np.bincount(key_group, minlength=n_groups + 1)[:n_groups]
+    start = np.concatenate([[0], np.cumsum(size)[:-1]])
+    rank = np.empty(len(values))
+    rank[order] = np.arange(len(values)) - np.concatenate([start, [size.sum()]])[key_group[order]]
+    return order, rank, start, size, valid
+
+
+def segmented_scores(values, codes, n_groups, method, limit):
+    valid = ~np.isnan(values) & (codes >= 0)
+    c = np.where(valid, codes, 0)
+    if method == "rank":
+        _, rank, _, size, _ = sorted_segments(values, codes, n_groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(valid, (rank / (size[c] - 1) - 0.5) * np.sqrt(12), np.nan)
+    x = values
+    if method == "winsor":
+        order, _, start, size, _ = sorted_segments(values, codes, n_groups)
+        last = max(len(values) - 1, 0)
+        sorted_values = values[order]
+        floor = sorted_values[np.minimum(start + np.floor(limit * (size - 1)).astype(int), last)]
+        ceiling = sorted_values[np.minimum(start + np.ceil((1 - limit) * (size - 1)).astype(int), last)]
+        x = np.where(valid, np.clip(values, floor[c], ceiling[c]), values)
+    _, mean, std = group_moments(x, codes, n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(valid, (x - mean[c]) / std[c], np.nan)
+
+
+def grouped_zscore(values, groups, method="z", min_group=MIN_GROUP_SIZE, limit=WINSOR_LIMIT):
+    """Standardize `values` within each group.
+
+    "z": (x - group mean) / group std. "winsor": the same after clipping each group to its
+    `limit` / 1 - `limit` quantiles. "rank": the within-group percentile rank scaled to unit
+    variance, (pct - 0.5) * sqrt(12); ties are ranked by position. Rows in groups smaller
+    than `min_group`, or with no group, get the universe-wide score instead."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown grouped z-score method '{method}', expected one of {METHODS}")
+    values = np.asarray(values, dtype=np.float64)
+    codes, n_groups = group_codes(groups)
+    scored = segmented_scores(values, codes, n_groups, method, limit)
+    universe = segmented_scores(values, np.zeros(len(values), dtype=int), 1, method, limit)
+    count, _, _ = group_moments(values, codes, n_groups)
+    small = (codes < 0) | (count[np.where(codes >= 0, codes, 0)] < min_group) | np.isnan(scored)
+    return np.where(small, universe, scored)
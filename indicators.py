@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+from stats_engine import TRADING_DAYS
+
+# Rolling technical indicators for every ticker of a date x ticker close panel at once.
+# Windows use cumulative sums and EMAs a first-order recursion, so a full history costs
+# O(days x tickers) and IndicatorState appends one new day in O(tickers).
+# Interior gaps are forward-filled (a day without a trade is a zero return); before a
+# ticker's first close everything is NaN until a full window is available.
+
+RSI_PERIOD = 14
+SMA_WINDOW = 50
+EMA_FAST = 12
+EMA_SLOW = 26
+VOL_WINDOW = 63
+BETA_WINDOW = 126
+
+INDICATORS = ["rsi_14", "sma_gap_50", "ema_cross_12_26", "volatility_63", "beta_126"]
+
+
+def rolling_sum(values, window):
+    # Sum over the trailing `window` rows; NaN until the window holds `window` valid values
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    out = sums.copy()
+    out[window:] -= sums[:-window]
+    n = counts.copy()
+    n[window:] -= counts[:-window]
+    out[n < window] = np.nan
+    return out
+
+
+def ema(values, alpha):
+    # e[t] = e[t-1] + alpha * (x[t] - e[t-1]), seeded with each column's first value
+    # (pandas ewm(alpha=alpha, adjust=False) on a series without interior gaps)
+    out = np.empty_like(values)
+    current = np.full(values.shape[1], np.nan)
+    for t in range(len(values)):
+        current = ema_step(current, values[t], alpha)
+        out[t] = current
+    return out
+
+
+def ema_step(current, x, alpha):
+    return np.where(np.isnan(current), x, current + alpha * (x - current))
+
+
+def span_alpha(span):
+    return 2.0 / (span + 1)
+
+
+def gains_losses(closes):
+    delta = np.diff(closes, axis=0, prepend=np.nan)
+    return np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)), \
+        np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+
+
+def rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    return np.where((avg_loss == 0) & ~np.isnan(avg_gain), 100.0, rsi)
+
+
+def rolling_moments(returns, bench, vol_window, beta_window):
+    vol_sum = rolling_sum(returns, vol_window)
+    vol_sq = rolling_sum(returns ** 2, vol_window)
+    volatility = moment_volatility(vol_sum, vol_sq, vol_window)
+    b = np.where(np.isnan(returns), np.nan, bench[:, None])
+    rb = np.where(np.isnan(b), np.nan, returns)
+    beta = moment_beta(rolling_sum(rb, beta_window), rolling_sum(b, beta_window),
+                       rolling_sum(rb * b, beta_window), rolling_sum(b * b, beta_window), beta_window)
+    return volatility, beta
+
+
+def moment_volatility(s, sq, n):
+    var = np.maximum(sq - s * s / n, 0.0) / (n - 1)
+    return np.sqrt(var) * np.sqrt(TRADING_DAYS)
+
+
+def moment_beta(sr, sb, srb, sbb, n):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = srb - sr * sb / n
+        var = sbb - sb * sb / n
+        return np.where(var > 0, cov / var, np.nan)
+
+
+def compute_indicators(close_panel, benchmark_returns=None):
+    """Full indicator history: {name: date x ticker DataFrame} for INDICATORS."""
+    closes = close_panel.ffill().to_numpy(dtype=np.float64)
+    returns = np.vstack([np.full((1, closes.shape[1]), np.nan), closes[1:] / closes[:-1] - 1])
+    gains, losses = gains_losses(closes)
+    rsi = rsi_from_averages(ema(gains, 1.0 / RSI_PERIOD), ema(losses, 1.0 / RSI_PERIOD))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sma_gap = closes / (rolling_sum(closes, SMA_WINDOW) / SMA_WINDOW) - 1
+        ema_cross = ema(closes, span_alpha(EMA_FAST)) / ema(closes, span_alpha(EMA_SLOW)) - 1
+    bench = aligned_benchmark(close_panel, benchmark_returns)
+    volatility, beta = rolling_moments(returns, bench, VOL_WINDOW, BETA_WINDOW)
+    values = [rsi, sma_gap, ema_cross, volatility, beta]
+    return {name: pd.DataFrame(v, index=close_panel.index, columns=close_panel.columns)
+            for name, v in zip(INDICATORS, values)}
+
+
+def latest_indicators(close_panel, benchmark_returns=None):
+    """Most recent value of every indicator, one row per ticker (feature-matrix columns)."""
+    return IndicatorState.from_panel(close_panel, benchmark_returns).latest()
+
+
+def aligned_benchmark(close_panel, benchmark_returns):
+    if benchmark_returns is None:
+        return np.full(len(close_panel), np.nan)
+    return benchmark_returns.reindex(close_panel.index).to_numpy(dtype=np.float64)
+
+
+class RollingSum:
+    # Ring buffer of the last `window` rows plus running sums and valid counts
+    def __init__(self, history, window):
+        self.window = window
+        tail = history[-window:]
+        self.ring = np.full((window, history.shape[1]), np.nan)
+        self.ring[window - len(tail):] = tail
+        self.pos = 0
+        self.sum = np.nansum(self.ring, axis=0)
+        self.count = (~np.isnan(self.ring)).sum(axis=0)
+
+    def push(self, row):
+        old = self.ring[self.pos]
+        self.sum += np.nan_to_num(row) - np.nan_to_num(old)
+        self.count += (~np.isnan(row)).astype(int) - (~np.isnan(old)).astype(int)
+        self.ring[self.pos] = row
+        self.pos = (self.pos + 1) % self.window
+
+    def value(self):
+        return np.where(self.count == self.window, self.sum, np.nan)
+
+
+class IndicatorState:
+    """Running state behind the latest indicator values, so appending one day of closes
+    (and the benchmark return) updates every ticker in O(tickers) instead of recomputing
+    the whole history."""
+
+    def __init__(self, tickers, last_close, ema_fast, ema_slow, avg_gain, avg_loss, sums):
+        self.tickers = list(tickers)
+        self.last_close = last_close
+        self.ema_fast = ema_fast
+        self.ema_slow = ema_slow
+        self.avg_gain = avg_gain
+        self.avg_loss = avg_loss
+        self.sums = sums
+
+    @classmethod
+    def from_panel(cls, close_panel, benchmark_returns=None):
+        closes = close_panel.ffill().to_numpy(dtype=np.float64)
+        returns = np.vstack([np.full((1, closes.shape[1]), np.nan), closes[1:] / closes[:-1] - 1])
+        bench = aligned_benchmark(close_panel, benchmark_returns)
+        b = np.where(np.isnan(returns), np.nan, bench[:, None])
+        rb = np.where(np.isnan(b), np.nan, returns)
+        gains, losses = gains_losses(closes)
+        sums = {
+            "close": RollingSum(closes, SMA_WINDOW),
+            "vol_r": RollingSum(returns, VOL_WINDOW),
+            "vol_rr": RollingSum(returns ** 2, VOL_WINDOW),
+            "beta_r": RollingSum(rb, BETA_WINDOW),
+            "beta_b": RollingSum(b, BETA_WINDOW),
+            "beta_rb": RollingSum(rb * b, BETA_WINDOW),
+            "beta_bb": RollingSum(b * b, BETA_WINDOW),
+        }
+        # A panel without rows (every download failed) starts from NaN, like a new listing
+        last = lambda values: values[-1].copy() if len(values) else np.full(closes.shape[1], np.nan)
+        return cls(close_panel.columns, last(closes),
+                   last(ema(closes, span_alpha(EMA_FAST))), last(ema(closes, span_alpha(EMA_SLOW))),
+                   last(ema(gains, 1.0 / RSI_PERIOD)), last(ema(losses, 1.0 / RSI_PERIOD)), sums)
+
+    def update(self, closes, benchmark_return=np.nan):
+        """Append one day. `closes` is aligned with `tickers`; NaN carries the last close."""
+        closes = np.where(np.isnan(closes), self.last_close, np.asarray(closes, dtype=np.float64))
+        delta = closes - self.last_close
+        gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+        loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+        returns = closes / self.last_close - 1
+        b = np.where(np.isnan(returns), np.nan, benchmark_return)
+        rb = np.where(np.isnan(b), np.nan, returns)
+        self.ema_fast = ema_step(self.ema_fast, closes, span_alpha(EMA_FAST))
+        self.ema_slow = ema_step(self.ema_slow, closes, span_alpha(EMA_SLOW))
+        self.avg_gain = ema_step(self.avg_gain, gain, 1.0 / RSI_PERIOD)
+        self.avg_loss = ema_step(self.avg_loss, loss, 1.0 / RSI_PERIOD)
+        for name, row in (("close", closes), ("vol_r", returns), ("vol_rr", returns ** 2), ("beta_r", rb),
+                          ("beta_b", b), ("beta_rb", rb * b), ("beta_bb", b * b)):
+            self.sums[name].push(row)
+        self.last_close = closes
+        return self
+
+    def latest(self):
+        s = {name: rolling.value() for name, rolling in self.sums.items()}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = {
+                "rsi_14": rsi_from_averages(self.avg_gain, self.avg_loss),
+                "sma_gap_50": self.last_close / (s["close"] / SMA_WINDOW) - 1,
+                "ema_cross_12_26": self.ema_fast / self.ema_slow - 1,
+                "volatility_63": moment_volatility(s["vol_r"], s["vol_rr"], VOL_WINDOW),
+                "beta_126": moment_beta(s["beta_r"], s["beta_b"], s["beta_rb"], s["beta_bb"], BETA_WINDOW),
+            }
+        return pd.DataFrame(values, index=self.tickers)[INDICATORS]
@@ -0,0 +1,322 @@
+import datetime as dt
+import time
+from array import array
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from price_cache import MARKET_TZ
+from profiling import latency_summary
+from stats_engine import pack_valid
+
+# Intraday rescoring: the daily close panel and the scored candidates of one strategy stay in
+# memory, and each last-price tick is treated as a provisional close for today. The live
+# features only depend on that one price and on per-ticker state taken from the panel once:
+#   momentum_1m = (sum of the last 19 daily returns) + price / last_close - 1
+#   momentum_3m = (sum of the last 61 daily returns) + price / last_close - 1
+#   drawdown    = min(historical max drawdown, price / max(peak close, price) - 1)
+# (the same windows as stats_engine.compute_statistical_features with the tick appended as a
+# new day). The panel is cut at the last completed session: a run during market hours has
+# already cached today's partial bar, which the ticks replace rather than follow. The score
+# is linear in them, so one tick costs O(1) plus an O(log n) move in the top-N heaps.
+# Everything else (fundamentals, z-score moments, volatility, filters) is held at its value
+# from the daily screen until the next full run.
+
+LIVE_FEATURES = ("momentum_1m", "momentum_3m", "drawdown")
+POLL_INTERVAL = 60.0
+
+
+class IndexedHeap:
+    """Binary min-heap of (key, item) with a position index, so an item's key can be changed
+    or the item removed in O(log n)."""
+
+    def __init__(self):
+        self.keys = []
+        self.items = []
+        self.position = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.position
+
+    def peek(self):
+        return self.keys[0], self.items[0]
+
+    def push(self, item, key):
+        self.keys.append(key)
+        self.items.append(item)
+        self.position[item] = len(self.items) - 1
+        self._up(len(self.items) - 1)
+
+    def pop(self):
+        key, item = self.keys[0], self.items[0]
+        self.remove(item)
+        return key, item
+
+    def update(self, item, key):
+        i = self.position[item]
+        old, self.keys[i] = self.keys[i], key
+        if key < old:
+            self._up(i)
+        else:
+            self._down(i)
+
+    def remove(self, item):
+        i = self.position.pop(item)
+        key, last_key, last_item = self.keys[i], self.keys.pop(), self.items.pop()
+        if i < len(self.items):
+            # The last leaf fills the hole and sifts whichever way restores the heap
+            self.keys[i], self.items[i] = last_key, last_item
+            self.position[last_item] = i
+            self._up(i)
+            self._down(self.position[last_item])
+        return key
+
+    def _swap(self, i, j):
+        keys, items = self.keys, self.items
+        keys[i], keys[j] = keys[j], keys[i]
+        items[i], items[j] = items[j], items[i]
+        self.position[items[i]] = i
+        self.position[items[j]] = j
+
+    def _up(self, i):
+        while i:
+            parent = (i - 1) // 2
+            if not self.keys[i] < self.keys[parent]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _down(self, i):
+        n = len(self.keys)
+        while True:
+            smallest, left = i, 2 * i + 1
+            if left < n and self.keys[left] < self.keys[smallest]:
+                smallest = left
+            if left + 1 < n and self.keys[left + 1] < self.keys[smallest]:
+                smallest = left + 1
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+
+class TopN:
+    # The n best items in a min-heap (worst of the top at the root) and the rest in a max-heap
+    # (keys negated). An update moves at most one item across, so it costs O(log n);
+    # update() returns (entered, left) when the top-n membership changed, else None.
+
+    def __init__(self, n):
+        self.n = n
+        self.top = IndexedHeap()
+        self.rest = IndexedHeap()
+
+    def update(self, item, score):
+        score = -np.inf if score != score else score
+        if item in self.top:
+            self.top.update(item, score)
+        elif item in self.rest:
+            self.rest.update(item, -score)
+        elif len(self.top) < self.n:
+            self.top.push(item, score)
+            return item, None
+        else:
+            self.rest.push(item, -score)
+        if self.rest and self.top and -self.rest.keys[0] > self.top.keys[0]:
+            left_score, left = self.top.pop()
+            entered_key, entered = self.rest.pop()
+            self.top.push(entered, -entered_key)
+            self.rest.push(left, -left_score)
+            return entered, left
+        return None
+
+    def ranking(self):
+        return sorted(zip(self.top.items, self.top.keys), key=lambda pair: pair[1], reverse=True)
+
+
+def live_coefficients(result):
+    # d(score) / d(live feature). "z" terms keep the candidates' std from the daily screen;
+    # group-relative terms would need per-group moments and are not supported live.
+    strategy, candidates = result.strategy, result.candidates
+    coef = dict.fromkeys(LIVE_FEATURES, 0.0)
+    for name, terms in strategy.components.items():
+        weight = strategy.score_weights.get(name, 0.0)
+        for column, c, kind in terms:
+            if column not in coef:
+                continue
+            if kind == 'raw':
+                coef[column] += weight * c
+            elif kind == 'z':
+                coef[column] += weight * c / pd.to_numeric(candidates[column]).std()
+            else:
+                raise ValueError(f"Intraday rescoring cannot update the {kind} term on {column}")
+    return coef
+
+
+def tick_state(close_panel, tickers, session):
+    # Per-ticker constants of the live feature formulas, from the packed daily closes of the
+    # sessions before `session`
+    closes = close_panel.loc[close_panel.index < pd.Timestamp(session), tickers]
+    packed, _, counts = pack_valid(closes.to_numpy(dtype=np.float64))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = packed[1:] / packed[:-1] - 1
+        peak = np.fmax.accumulate(packed, axis=0)
+        drawdown = np.nanmin(packed / peak - 1, axis=0) if len(packed) else np.full(len(tickers), np.nan)
+    return {
+        "last": packed[-1],
+        "peak": peak[-1],
+        "base_1m": np.where(counts >= 20, returns[-19:].sum(axis=0), np.nan),
+        "base_3m": np.where(counts >= 62, returns[-61:].sum(axis=0), np.nan),
+        "drawdown": drawdown,
+    }
+
+
+class IntradayScreen:
+    """Live top-N of one scored strategy (a ScreenResult from the daily run) under last-price
+    ticks. `publish(event)` is called whenever the top-N membership changes, with the tick's
+    timestamp, the tickers that entered/left and the new ranking. Per-tick update latency
+    (tick in hand to ranking updated and published) is kept for report(). `session` is the
+    trading day the ticks belong to (default: today in New York)."""
+
+    def __init__(self, result, close_panel, top_n=None, publish=None, session=None):
+        self.result = result
+        self.tickers = list(result.candidates['ticker'])
+        self.slot = {ticker: i for i, ticker in enumerate(self.tickers)}
+        coef = live_coefficients(result)
+        self.coef_1m, self.coef_3m, self.coef_dd = (coef[c] for c in LIVE_FEATURES)
+        self.session = session or dt.datetime.now(MARKET_TZ).date()
+        state = tick_state(close_panel, self.tickers, self.session)
+        opening = {c: pd.to_numeric(result.candidates[c]).to_numpy(dtype=np.float64) for c in LIVE_FEATURES}
+        # score = constant + sum(coef * live feature); the constant holds every frozen term
+        constant = result.candidates['score'].to_numpy(dtype=np.float64) - sum(coef[c] * opening[c] for c in coef)
+        # Python lists: per-tick scalar access is several times faster than numpy indexing
+        self.constant = constant.tolist()
+        self.last, self.peak = state["last"].tolist(), state["peak"].tolist()
+        self.base_1m, self.base_3m = state["base_1m"].tolist(), state["base_3m"].tolist()
+        self.base_drawdown = state["drawdown"].tolist()
+        self.live = {c: opening[c].copy() for c in LIVE_FEATURES}
+        self.scores = result.candidates['score'].to_numpy(dtype=np.float64).copy()
+        self.ranking = TopN(top_n or result.strategy.top_n)
+        for i, score in enumerate(self.scores.tolist()):
+            self.ranking.update(i, score)
+        self.publish = publish
+        self.ticks = 0
+        self.ignored = 0
+        self.changes = 0
+        self.latencies = array('d')
+
+    def on_tick(self, ticker, price, timestamp=None):
+        i = self.slot.get(ticker)
+        if i is None or not price > 0:
+            self.ignored += 1
+            return None
+        self.ticks += 1
+        move = price / self.last[i] - 1
+        momentum_1m = self.base_1m[i] + move
+        momentum_3m = self.base_3m[i] + move
+        peak = self.peak[i]
+        drawdown = min(self.base_drawdown[i], price / peak - 1 if price < peak else 0.0)
+        score = self.constant[i] + self.coef_1m * momentum_1m + self.coef_3m * momentum_3m \
+            + self.coef_dd * drawdown
+        live = self.live
+        live["momentum_1m"][i], live["momentum_3m"][i], live["drawdown"][i] = momentum_1m, momentum_3m, drawdown
+        self.scores[i] = score
+        change = self.ranking.update(i, score)
+        if change is not None:
+            self.changes += 1
+            if self.publish is not None:
+                entered, left = change
+                self.publish({"timestamp": timestamp, "entered": self.tickers[entered],
+                              "left": None if left is None else self.tickers[left],
+                              "top": [(self.tickers[j], s) for j, s in self.ranking.ranking()]})
+        return change
+
+    def run(self, ticks, max_ticks=None):
+        """Apply (timestamp, ticker, price) ticks from any iterable (TickFile, PollingSource)."""
+        clock = time.perf_counter
+        record = self.latencies.append
+        for n, (timestamp, ticker, price) in enumerate(ticks, start=1):
+            start = clock()
+            self.on_tick(ticker, price, timestamp)
+            record(clock() - start)
+            if max_ticks is not None and n >= max_ticks:
+                break
+        return self
+
+    def top(self):
+        # The current top-N in the daily screen's display columns, live values filled in
+        slots = [i for i, _ in self.ranking.ranking()]
+        frame = self.result.candidates.iloc[slots].copy()
+        frame['score'] = self.scores[slots]
+        for column, values in self.live.items():
+            frame[column] = values[slots]
+        return frame[self.result.strategy.display_columns]
+
+    def report(self):
+        return {"candidates": len(self.tickers), "ticks": self.ticks, "ignored": self.ignored,
+                "top_n_changes": self.changes, "latency": latency_summary(self.latencies)}
+
+
+class TickFile:
+    """Replays a local tick file (CSV with timestamp, ticker, price columns, in time order),
+    read `chunksize` rows at a time. With `realtime` the gaps between timestamps are slept
+    (divided by `speed`); otherwise ticks are yielded as fast as they are consumed."""
+
+    def __init__(self, path, realtime=False, speed=1.0, chunksize=100_000):
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+        self.chunksize = chunksize
+
+    def __iter__(self):
+        started = first = None
+        for chunk in pd.read_csv(self.path, chunksize=self.chunksize):
+            if self.realtime:
+                seconds = pd.to_datetime(chunk["timestamp"]).astype("int64").to_numpy() / 1e9
+            for n, (timestamp, ticker, price) in enumerate(zip(chunk["timestamp"].tolist(), chunk["ticker"].tolist(),
+                                                                chunk["price"].tolist())):
+                if self.realtime:
+                    if started is None:
+                        started, first = time.monotonic(), seconds[n]
+                    delay = (seconds[n] - first) / self.speed - (time.monotonic() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                yield timestamp, ticker, price
+
+
+def yf_last_prices(tickers):
+    # Latest 1-minute close per ticker from today's session
+    data = yf.download(list(tickers), period="1d", interval="1m", progress=False)
+    if data.empty:
+        return {}
+    closes = data["Close"].ffill().iloc[-1]
+    return {ticker: price for ticker, price in closes.items() if price == price}
+
+
+class PollingSource:
+    """Polls `fetch(tickers) -> {ticker: last price}` every `interval` seconds and yields a
+    tick for every price that changed since the previous poll. Stops after `polls` polls
+    (None: runs until interrupted)."""
+
+    def __init__(self, tickers, fetch=yf_last_prices, interval=POLL_INTERVAL, polls=None):
+        self.tickers = list(tickers)
+        self.fetch = fetch
+        self.interval = interval
+        self.polls = polls
+
+    def __iter__(self):
+        seen = {}
+        n = 0
+        while self.polls is None or n < self.polls:
+            started = time.monotonic()
+            timestamp = pd.Timestamp.now().isoformat()
+            for ticker, price in self.fetch(self.tickers).items():
+                if seen.get(ticker) != price:
+                    seen[ticker] = price
+                    yield timestamp, ticker, price
+            n += 1
+            if self.polls is None or n < self.polls:
+                time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
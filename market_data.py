@@ -0,0 +1,189 @@
+import os
+
+import yfinance as yf
+import pandas as pd
+import numpy as np
+
+LOOKBACK_YEARS = 3
+BENCHMARK = "SPY"
+CHUNK_SIZE = 100
+PRICE_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def flatten_columns(data):
+    # yfinance returns MultiIndex columns like ('Close', 'SPY'); flatten to 'Close_SPY'
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = ['_'.join([str(i) for i in col]).strip('_') for col in data.columns]
+    return data
+
+
+def close_column(data):
+    return next((c for c in data.columns if str(c).startswith('Close')), None)
+
+
+def split_fields(data, symbols, fields):
+    # Turn one yf.download result into {field: date x ticker frame}. Single-ticker
+    # downloads from older yfinance come back with flat 'Close' columns, newer ones
+    # with ('Close', 'AAPL'), which flattens to 'Close_AAPL'.
+    data = flatten_columns(data)
+    out = {field: {} for field in fields}
+    for col in data.columns:
+        name = str(col)
+        if name in out and len(symbols) == 1:
+            field, symbol = name, symbols[0]
+        else:
+            field, _, symbol = name.partition('_')
+        if field in out and symbol in symbols:
+            out[field][symbol] = data[col]
+    return {field: pd.DataFrame(cols, index=data.index) for field, cols in out.items()}
+
+
+class BenchmarkProvider:
+    """Downloads each benchmark (SPY plus any extras such as sector ETFs) once per run
+    and hands the cached daily returns to every per-ticker beta calculation. With a
+    `scheduler` the download is rate limited and retried on throttling, like PriceLoader's.
+    A benchmark that still fails gives empty returns, so beta is NaN for that run instead
+    of the whole screen failing."""
+
+    def __init__(self, symbols=(BENCHMARK,), years=LOOKBACK_YEARS, download=None, scheduler=None):
+        self.symbols = list(symbols)
+        self.years = years
+        self.download = download or yf.download
+        if scheduler is not None:
+            self.download = scheduler.throttled(self.download)
+        self.fetch_count = 0
+        self._returns = {}
+
+    def returns(self, symbol=BENCHMARK):
+        if symbol not in self._returns:
+            self._returns[symbol] = self._fetch_returns(symbol)
+        return self._returns[symbol]
+
+    def load(self):
+        for symbol in self.symbols:
+            self.returns(symbol)
+        return self
+
+    def _fetch_returns(self, symbol):
+        self.fetch_count += 1
+        try:
+            data = flatten_columns(self.download(symbol, period=f"{self.years}y", interval="1d", progress=False))
+        except Exception as e:
+            print(f"Benchmark download failed ({symbol}): {e}; beta is NaN this run")
+            return pd.Series(dtype=float)
+        col = close_column(data)
+        if col is None or data[col].isna().all():
+            print(f"No benchmark data for {symbol}; beta is NaN this run")
+            return pd.Series(dtype=float)
+        return data[col].dropna().pct_change().dropna()
+
+
+class PriceLoader:
+    """Downloads the universe in chunks and returns one wide date x ticker float64 panel
+    per field. Symbols missing from a chunk (or a chunk that raises) are retried one by one;
+    anything still missing ends up as an all-NaN column and is listed in `failed`.
+
+    With a `scheduler` every download is rate limited and retried on throttling. Chunks run
+    one at a time unless `chunk_workers` > 1: yf.download keeps module-level state and is not
+    safe to call from several threads, but it already fetches a chunk's symbols in parallel."""
+
+    def __init__(self, years=LOOKBACK_YEARS, chunk_size=CHUNK_SIZE, fields=("Close",), retries=1, download=None,
+                 scheduler=None, chunk_workers=1):
+        self.years = years
+        self.chunk_size = chunk_size
+        self.fields = list(fields)
+        self.retries = retries
+        self.download = download or yf.download
+        self.scheduler = scheduler
+        self.chunk_workers = chunk_workers
+        if scheduler is not None:
+            self.download = scheduler.throttled(self.download)
+        self.download_calls = 0
+        self.failed = []
+
+    def load(self, tickers, start=None):
+        # `start` fetches from that date onwards instead of the full lookback period
+        tickers = list(dict.fromkeys(tickers))
+        frames = {field: [] for field in self.fields}
+        self.failed = []
+        chunks = [tickers[i:i + self.chunk_size] for i in range(0, len(tickers), self.chunk_size)]
+        if self.scheduler is not None and self.chunk_workers > 1:
+            parts = self.scheduler.map(lambda chunk: self.load_chunk(chunk, start), chunks,
+                                       key=lambda chunk: chunk[0], max_workers=self.chunk_workers)
+        else:
+            parts = [self.load_chunk(chunk, start) for chunk in chunks]
+        for part in parts:
+            for field, frame in (part or {}).items():
+                frames[field].append(frame)
+        panels = {}
+        for field in self.fields:
+            panel = pd.concat(frames[field], axis=1) if frames[field] else pd.DataFrame()
+            panels[field] = panel.reindex(columns=tickers).sort_index().astype(np.float64)
+        return panels
+
+    def load_chunk(self, chunk, start=None):
+        try:
+            parts = split_fields(self._download(chunk, start), chunk, self.fields)
+        except Exception as e:
+            print(f"Chunk download failed ({chunk[0]}..{chunk[-1]}): {e}")
+            parts = {field: pd.DataFrame() for field in self.fields}
+        closes = parts.get("Close", next(iter(parts.values())))
+        missing = [t for t in chunk if t not in closes.columns or closes[t].isna().all()]
+        for ticker in missing:
+            single = self._retry(ticker, start)
+            for field in self.fields:
+                if single is not None and ticker in single[field].columns:
+                    parts[field] = parts[field].drop(columns=ticker, errors='ignore').join(single[field], how='outer')
+        return parts
+
+    def _retry(self, ticker, start=None):
+        for _ in range(self.retries):
+            try:
+                single = split_fields(self._download(ticker, start), [ticker], self.fields)
+            except Exception:
+                continue
+            closes = single.get("Close", next(iter(single.values())))
+            if ticker in closes.columns and closes[ticker].notna().any():
+                return single
+        self.failed.append(ticker)
+        return None
+
+    def _download(self, symbols, start=None):
+        self.download_calls += 1
+        if start is not None:
+            return self.download(symbols, start=start, interval="1d", progress=False)
+        return self.download(symbols, period=f"{self.years}y", interval="1d", progress=False)
+
+
+class CsvReplaySource:
+    """Local stand-in for yf.download that replays `<TICKER>.csv` fixture files (Date plus
+    OHLCV columns) in the same ('Close', 'AAPL') MultiIndex layout yfinance returns.
+    Rows after `as_of` are hidden, which lets a test replay the market day by day."""
+
+    def __init__(self, directory, as_of=None):
+        self.directory = directory
+        self.as_of = as_of
+        self.calls = 0
+
+    def read(self, ticker):
+        path = os.path.join(self.directory, f"{ticker}.csv")
+        if not os.path.exists(path):
+            return None
+        data = pd.read_csv(path, index_col="Date", parse_dates=True)
+        return data if self.as_of is None else data[data.index <= pd.Timestamp(self.as_of)]
+
+    def __call__(self, tickers, period=None, interval="1d", progress=False, start=None, **kwargs):
+        self.calls += 1
+        symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+        frames = {}
+        for ticker in symbols:
+            data = self.read(ticker)
+            if data is None:
+                data = pd.DataFrame(np.nan, index=pd.DatetimeIndex([], name="Date"), columns=list(PRICE_FIELDS))
+            if start is not None:
+                data = data[data.index >= pd.Timestamp(start)]
+            elif period is not None and period.endswith("y") and not data.empty:
+                data = data[data.index > data.index.max() - pd.DateOffset(years=int(period[:-1]))]
+            frames[ticker] = data
+        out = pd.concat(frames, axis=1).swaplevel(0, 1, axis=1)
+        return out.reindex(columns=pd.MultiIndex.from_product([list(PRICE_FIELDS), symbols]))
@@ -0,0 +1,63 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from indicators import latest_indicators
+from stats_engine import compute_statistical_features
+
+# Price features (statistics + latest indicators) with the ticker universe split across a
+# process pool. The parent writes the aligned close panel once to a memory-mapped .npy file;
+# each worker maps it and reads only its own block of columns, so no DataFrame is ever
+# pickled to a worker and only the small per-ticker feature rows come back. Every feature is
+# computed per ticker column, so a worker's block gives bit-for-bit the values the whole
+# panel would; blocks are merged back in column order.
+
+COMPUTE_WORKERS = 1
+BLOCKS_PER_WORKER = 4  # smaller blocks even out workers stuck with long-history tickers
+
+_shared = {}
+
+
+def price_features(close_panel, benchmark_returns=None):
+    """Single-process reference: one row per ticker of STAT_FEATURES + INDICATORS."""
+    return compute_statistical_features(close_panel, benchmark_returns).join(
+        latest_indicators(close_panel, benchmark_returns))
+
+
+def _attach(path, index, tickers, bench):
+    _shared["closes"] = np.load(path, mmap_mode="r")
+    _shared["index"] = pd.DatetimeIndex(index, name="Date")
+    _shared["tickers"] = tickers
+    _shared["bench"] = None if bench is None else pd.Series(bench, index=_shared["index"])
+
+
+def _block_features(block):
+    start, stop = block
+    # Copy just this block out of the map so it has the same C layout as a full panel
+    closes = np.ascontiguousarray(_shared["closes"][:, start:stop])
+    panel = pd.DataFrame(closes, index=_shared["index"], columns=_shared["tickers"][start:stop])
+    return price_features(panel, _shared["bench"])
+
+
+def parallel_price_features(close_panel, benchmark_returns=None, workers=COMPUTE_WORKERS, blocks=None):
+    """Same result as `price_features`, computed by `workers` processes."""
+    n = close_panel.shape[1]
+    if workers <= 1 or n < 2:
+        return price_features(close_panel, benchmark_returns)
+    blocks = min(blocks or workers * BLOCKS_PER_WORKER, n)
+    bounds = np.linspace(0, n, blocks + 1).astype(int)
+    bench = None if benchmark_returns is None else \
+        benchmark_returns.reindex(close_panel.index).to_numpy(dtype=np.float64)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "closes.npy")
+        shared = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=close_panel.shape)
+        shared[:] = close_panel.to_numpy(dtype=np.float64)
+        shared.flush()
+        del shared
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(path, close_panel.index.to_numpy(), list(close_panel.columns), bench)) as pool:
+            parts = list(pool.map(_block_features, zip(bounds[:-1], bounds[1:])))
+    return pd.concat(parts)
@@ -0,0 +1,250 @@
+import datetime as dt
+import json
+import os
+from collections.abc import Mapping
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from market_data import CHUNK_SIZE, LOOKBACK_YEARS, PRICE_FIELDS, PriceLoader
+
+CACHE_DIR = ".price_cache"
+OVERLAP_DAYS = 5  # cached sessions re-fetched on every append to detect adjusted history
+ADJUSTMENT_TOLERANCE = 1e-6
+RECORD_DTYPE = np.dtype([("date", "datetime64[D]")] + [(field, "f8") for field in PRICE_FIELDS])
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE = dt.time(16, 0)
+
+
+def last_session(today):
+    # Most recent weekday on or before `today`. Exchange holidays are not modelled; on a
+    # holiday a stale ticker just costs one tail request that brings back nothing new.
+    while today.weekday() >= 5:
+        today -= dt.timedelta(days=1)
+    return today
+
+
+def session_closed(date, now):
+    # During a session yfinance returns that day's partial bar; it is final once the market
+    # has closed. A naive `now` is taken as exchange time.
+    now = now.astimezone(MARKET_TZ) if now.tzinfo else now
+    return date < now.date() or (date == now.date() and now.time() >= MARKET_CLOSE)
+
+
+def to_records(panels, ticker):
+    closes = panels["Close"][ticker].dropna()
+    records = np.zeros(len(closes), dtype=RECORD_DTYPE)
+    records["date"] = closes.index.values.astype("datetime64[D]")
+    for field in PRICE_FIELDS:
+        records[field] = panels[field][ticker].reindex(closes.index).to_numpy(dtype=np.float64)
+    return records
+
+
+def append_records(cached, fresh):
+    # Returns None when the re-fetched overlap no longer matches the cache: yfinance prices
+    # are split- and dividend-adjusted, so any corporate action rewrites the whole history.
+    last = cached["date"][-1]
+    overlap = fresh[fresh["date"] <= last]
+    if len(overlap):
+        pos = np.searchsorted(cached["date"], overlap["date"])
+        pos = np.minimum(pos, len(cached) - 1)
+        known = cached["date"][pos] == overlap["date"]
+        old, new = cached["Close"][pos][known], overlap["Close"][known]
+        if (~known).any() or np.any(np.abs(new / old - 1) > ADJUSTMENT_TOLERANCE):
+            return None
+    return np.concatenate([cached, fresh[fresh["date"] > last]])
+
+
+class CachedRecords(Mapping):
+    """{ticker: records} over the cache. Each access memory maps the ticker's file and the
+    map is released with the array; keeping every ticker mapped at once would hold one file
+    descriptor per ticker and fail for universes beyond the open-file limit."""
+
+    def __init__(self, cache, tickers):
+        self.cache = cache
+        self.tickers = list(tickers)
+        self._members = set(self.tickers)
+
+    def __getitem__(self, ticker):
+        if ticker not in self._members:
+            raise KeyError(ticker)
+        return self.cache.read(ticker)
+
+    def __iter__(self):
+        return iter(self.tickers)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def last_date(self, ticker):
+        return self.cache.index[ticker]["last_date"]
+
+
+class PriceCache:
+    """Per-ticker OHLCV history on disk (one memory-mappable .npy record array per ticker plus
+    an index.json of last cached dates). Later runs only download the missing tail; tickers
+    whose adjusted history changed are invalidated and re-downloaded in full. A last bar
+    fetched before its session closed is marked provisional in the index: the next run
+    re-downloads it and replaces it instead of comparing it against the final close."""
+
+    def __init__(self, directory=CACHE_DIR, years=LOOKBACK_YEARS, chunk_size=CHUNK_SIZE, download=None, today=None,
+                 scheduler=None, now=None):
+        self.directory = directory
+        self.years = years
+        self.today = today
+        self.now = now
+        self.loader = PriceLoader(years=years, chunk_size=chunk_size, fields=PRICE_FIELDS, download=download,
+                                  scheduler=scheduler)
+        self.failed = []
+        self.stats = {}
+        os.makedirs(directory, exist_ok=True)
+        self.index = self._read_index()
+
+    def path(self, ticker):
+        return os.path.join(self.directory, f"{ticker}.npy")
+
+    def read(self, ticker):
+        if ticker not in self.index or not os.path.exists(self.path(ticker)):
+            return None
+        return np.load(self.path(ticker), mmap_mode="r")
+
+    def write(self, ticker, records, checked, now):
+        cutoff = np.datetime64(pd.Timestamp(records["date"][-1]) - pd.DateOffset(years=self.years, days=30), "D")
+        records = records[records["date"] > cutoff]
+        # Write then rename, so a memory-mapped copy of the old file stays valid
+        tmp = self.path(ticker) + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, records)
+        os.replace(tmp, self.path(ticker))
+        last = records["date"][-1]
+        self.index[ticker] = {"last_date": str(last), "checked": checked, "checked_at": now.isoformat(),
+                              "provisional": not session_closed(last.item(), now)}
+
+    def final(self, ticker):
+        # Cached records without a provisional last bar
+        records = self.read(ticker)
+        return records[:-1] if self.index[ticker].get("provisional") else records
+
+    def load(self, tickers, fields=("Close",), refresh=False):
+        return self.panel(self.update(tickers, refresh), list(dict.fromkeys(tickers)), fields)
+
+    def update(self, tickers, refresh=False):
+        # Bring the cache up to date and return {ticker: records}. Records are memory mapped
+        # from disk when accessed (see CachedRecords), never all held open at once.
+        today = self.today or dt.date.today()
+        now = self.now or dt.datetime.now(MARKET_TZ)
+        checked = today.isoformat()
+        session = last_session(today)
+        tickers = list(dict.fromkeys(tickers))
+        self.stats = {"fresh": 0, "appended": 0, "cold": 0, "invalidated": 0}
+        available, cold, stale = set(), [], {}
+        for ticker in tickers:
+            entry = None if refresh else self.index.get(ticker)
+            if entry is None or not os.path.exists(self.path(ticker)):
+                cold.append(ticker)
+                continue
+            available.add(ticker)
+            # Fresh tickers are decided from the index alone; only stale files are opened here.
+            # A check earlier today only counts once the session had closed: a morning run
+            # has not seen the bar an evening run should fetch.
+            provisional = entry.get("provisional", False)
+            if not provisional and (dt.date.fromisoformat(entry["last_date"]) >= session
+                                    or entry["checked"] == checked and "checked_at" in entry
+                                    and session_closed(session, dt.datetime.fromisoformat(entry["checked_at"]))):
+                self.stats["fresh"] += 1
+            else:
+                cached = self.read(ticker)
+                start = str(cached["date"][-min(OVERLAP_DAYS + provisional, len(cached))])
+                stale.setdefault(start, []).append(ticker)
+
+        failed = []
+        for start, group in stale.items():
+            panels = self.loader.load(group, start=start)
+            failed += self.loader.failed
+            for ticker in group:
+                fresh = to_records(panels, ticker)
+                if not len(fresh):
+                    # The tail download failed: serve the cached history and leave `checked`
+                    # as it was, so the next run retries
+                    failed.append(ticker)
+                    continue
+                cached = self.final(ticker)
+                merged = append_records(cached, fresh) if len(cached) else cached
+                del cached
+                if merged is None:
+                    self.stats["invalidated"] += 1
+                    available.discard(ticker)
+                    cold.append(ticker)
+                    continue
+                if not len(merged):
+                    available.discard(ticker)
+                    cold.append(ticker)
+                    continue
+                self.stats["appended"] += 1
+                self.write(ticker, merged, checked, now)
+
+        if cold:
+            panels = self.loader.load(cold)
+            failed += self.loader.failed
+            for ticker in cold:
+                fresh = to_records(panels, ticker)
+                if len(fresh):
+                    self.stats["cold"] += 1
+                    self.write(ticker, fresh, checked, now)
+                    available.add(ticker)
+        self.failed = list(dict.fromkeys(failed))
+        self._write_index()
+        return CachedRecords(self, [t for t in tickers if t in available])
+
+    def cached_panel(self, tickers, fields=PRICE_FIELDS):
+        # Panels straight from what is on disk, without checking for newer sessions
+        tickers = list(dict.fromkeys(tickers))
+        present = [t for t in tickers if t in self.index and os.path.exists(self.path(t))]
+        return self.panel(CachedRecords(self, present), tickers, fields)
+
+    def closes(self, ticker):
+        # One ticker's cached closes over the lookback window ending at its last session
+        records = self.read(ticker)
+        if records is None or not len(records):
+            return pd.Series(dtype=np.float64)
+        cutoff = pd.Timestamp(records["date"][-1]) - pd.DateOffset(years=self.years)
+        records = records[records["date"] > np.datetime64(cutoff, "D")]
+        return pd.Series(np.array(records["Close"]), index=pd.DatetimeIndex(records["date"], name="Date"))
+
+    def panel(self, records, tickers, fields):
+        # Trim every ticker to the lookback window ending at the newest cached session, which
+        # is what a cold `period=f"{years}y"` download would return. Two passes over the
+        # memory-mapped records: the union of dates first, then every field is scattered
+        # straight into a preallocated date x ticker array.
+        tickers = list(tickers)
+        if not len(records):
+            return {field: pd.DataFrame(columns=tickers, dtype=np.float64) for field in fields}
+        latest = max(np.datetime64(records.last_date(t), "D") for t in records)
+        cutoff = np.datetime64(pd.Timestamp(latest) - pd.DateOffset(years=self.years), "D")
+        dates = []
+        for ticker in records:
+            rec_dates = records[ticker]["date"]
+            dates.append(np.array(rec_dates[rec_dates > cutoff]))
+        index = np.unique(np.concatenate(dates))
+        column = {ticker: i for i, ticker in enumerate(tickers)}
+        values = {field: np.full((len(index), len(tickers)), np.nan) for field in fields}
+        for ticker, rec_dates in zip(records, dates):
+            rec = records[ticker]
+            rec = rec[len(rec) - len(rec_dates):]
+            rows = np.searchsorted(index, rec_dates)
+            for field in fields:
+                values[field][rows, column[ticker]] = rec[field]
+        index = pd.DatetimeIndex(index, name="Date")
+        return {field: pd.DataFrame(v, index=index, columns=tickers) for field, v in values.items()}
+
+    def _read_index(self):
+        path = os.path.join(self.directory, "index.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_index(self):
+        with open(os.path.join(self.directory, "index.json"), "w") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
@@ -0,0 +1,117 @@
+import cProfile
+import json
+import pstats
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+# Run instrumentation: wall/CPU time per pipeline stage, per-provider call counts and
+# latencies, rows dropped by each required-column and filter step, plus any counters the
+# caller adds. `report()` is a JSON-ready dict; with `cprofile` the stages marked as compute
+# also run under cProfile and the report lists their most expensive functions.
+
+CPROFILE_TOP = 25
+
+
+class RunProfile:
+    def __init__(self, cprofile=False):
+        self.started = time.time()
+        self.stages = {}
+        self.calls = {}
+        self.errors = {}
+        self.drops = []
+        self.counters = {}
+        self.profiler = cProfile.Profile() if cprofile else None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, compute=False):
+        wall, cpu = time.perf_counter(), time.process_time()
+        profiling = compute and self.profiler is not None
+        if profiling:
+            self.profiler.enable()
+        try:
+            yield
+        finally:
+            if profiling:
+                self.profiler.disable()
+            stage = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "runs": 0})
+            stage["wall_s"] += time.perf_counter() - wall
+            stage["cpu_s"] += time.process_time() - cpu
+            stage["runs"] += 1
+
+    def timed(self, provider, fn):
+        # Wrap a provider call (yf.download, Ticker.info, ...) to record its latency and errors
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                with self._lock:
+                    self.errors.setdefault(provider, Counter())[type(e).__name__] += 1
+                raise
+            finally:
+                with self._lock:
+                    self.calls.setdefault(provider, []).append(time.perf_counter() - start)
+        return call
+
+    def record_drop(self, strategy, step, before, after):
+        self.drops.append({"strategy": strategy, "step": step, "rows_in": before, "dropped": before - after})
+
+    def count(self, name, value):
+        self.counters[name] = value
+
+    def cprofile_top(self, n=CPROFILE_TOP):
+        if self.profiler is None:
+            return []
+        stats = pstats.Stats(self.profiler).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:n]
+        return [{"function": f"{path}:{line}({name})", "calls": calls, "tottime_s": tottime, "cumtime_s": cumtime}
+                for (path, line, name), (_, calls, tottime, cumtime, _) in rows]
+
+    def report(self):
+        with self._lock:
+            calls = {provider: latency_summary(latencies) for provider, latencies in self.calls.items()}
+            for provider, errors in self.errors.items():
+                calls.setdefault(provider, latency_summary([]))["errors"] = dict(errors)
+        report = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_wall_s": time.time() - self.started,
+            "stages": self.stages,
+            "calls": calls,
+            "drops": self.drops,
+            "counters": self.counters,
+        }
+        if self.profiler is not None:
+            report["cprofile"] = self.cprofile_top()
+        return report
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2, default=float)
+        return path
+
+    def dump_cprofile(self, path):
+        # Raw stats for snakeviz / `python -m pstats`
+        if self.profiler is not None:
+            self.profiler.dump_stats(path)
+
+
+def latency_summary(latencies):
+    latencies = np.asarray(latencies, dtype=np.float64)
+    if not len(latencies):
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "total_s": float(latencies.sum()),
+        "p50_s": float(np.percentile(latencies, 50)),
+        "p95_s": float(np.percentile(latencies, 95)),
+        "max_s": float(latencies.max()),
+    }
+
+
+def hit_ratio(hits, misses):
+    return hits / (hits + misses) if hits + misses else None
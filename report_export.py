@@ -0,0 +1,197 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from market_data import PRICE_FIELDS
+
+# Batch reports for many tickers from the data a screen already loaded (feature matrix +
+# cached price panels), instead of export_qcom_data.py's download-per-ticker workbook.
+#   - Bulk output is columnar: a summary table plus one long Date/Ticker/OHLCV table, streamed
+#     a block of tickers at a time to CSV, or to Parquet row groups when pyarrow is installed.
+#   - The human-facing workbook is written row by row through a write-only engine
+#     (xlsxwriter constant_memory, else openpyxl write_only), so memory stays flat however
+#     many rows it has. Excel caps a sheet at 1,048,576 rows, so per-ticker OHLCV sheets are
+#     only written for the first `ohlcv_sheets` tickers; the rest belong in the bulk output.
+# pyarrow, xlsxwriter and openpyxl are optional; each path raises ImportError without its library.
+
+BLOCK_TICKERS = 250
+MAX_OHLCV_SHEETS = 50
+HIGH_LOW_DAYS = 252
+
+# feature -> Summary column, in export_qcom_data.py's naming
+SUMMARY_COLUMNS = {
+    "ticker": "Ticker",
+    "score": "Score",
+    "sector": "Sector",
+    "industry": "Industry",
+    "pe": "PE Ratio",
+    "roe": "ROE",
+    "debt_equity": "Debt/Equity",
+    "insider_own": "Insider Ownership",
+    "revenue_growth": "Revenue Growth",
+    "eps_growth": "Earnings Growth",
+    "beta": "Beta",
+    "volatility": "Volatility (Annualized)",
+    "sharpe": "Sharpe Ratio",
+    "momentum_1m": "Momentum 1M",
+    "momentum_3m": "Momentum 3M",
+    "drawdown": "Max Drawdown",
+}
+
+
+def summary_frame(features, close_panel, tickers=None):
+    """One row per ticker (in `tickers` order, default all): the features under their report
+    names plus current price and 52-week high/low taken from the close panel."""
+    features = features.set_index('ticker', drop=False)
+    tickers = list(features.index if tickers is None else tickers)
+    summary = features.reindex(tickers)[[c for c in SUMMARY_COLUMNS if c in features.columns]]
+    summary = summary.rename(columns=SUMMARY_COLUMNS)
+    summary["Ticker"] = tickers
+    closes = close_panel.reindex(columns=tickers)
+    recent = closes.iloc[-HIGH_LOW_DAYS:]
+    summary["52 Week High"] = recent.max().to_numpy()
+    summary["52 Week Low"] = recent.min().to_numpy()
+    summary["Current Price"] = closes.ffill().iloc[-1].to_numpy() if len(closes) else np.nan
+    return summary.reset_index(drop=True)
+
+
+def long_blocks(panels, tickers, block=BLOCK_TICKERS):
+    # Date/Ticker/OHLCV rows, `block` tickers at a time, skipping days without a close
+    fields = [f for f in PRICE_FIELDS if f in panels]
+    index = panels["Close"].index
+    for start in range(0, len(tickers), block):
+        chunk = list(tickers[start:start + block])
+        values = {f: panels[f].reindex(columns=chunk).to_numpy(dtype=np.float64).T.ravel() for f in fields}
+        frame = pd.DataFrame({"Date": np.tile(index.values, len(chunk)), "Ticker": np.repeat(chunk, len(index)),
+                              **values})
+        yield frame[~np.isnan(values["Close"])]
+
+
+def write_csv(path, frames):
+    header = True
+    with open(path, "w", newline="") as f:
+        for frame in frames:
+            frame.to_csv(f, index=False, header=header, date_format="%Y-%m-%d")
+            header = False
+    return path
+
+
+def write_parquet(path, frames):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet}
+
+
+def export_bulk(directory, features, panels, tickers=None, format="csv", block=BLOCK_TICKERS):
+    """summary.<format> and prices.<format> (long OHLCV) for `tickers` (default: all)."""
+    write = WRITERS[format]
+    tickers = list(features['ticker'] if tickers is None else tickers)
+    os.makedirs(directory, exist_ok=True)
+    summary = write(os.path.join(directory, f"summary.{format}"), [summary_frame(features, panels["Close"], tickers)])
+    prices = write(os.path.join(directory, f"prices.{format}"), long_blocks(panels, tickers, block))
+    return summary, prices
+
+
+def cells(frame):
+    # Row tuples Excel writers accept: NaN/NaT -> empty cell, numpy scalars -> Python
+    columns = []
+    for name in frame.columns:
+        values = frame[name]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            columns.append([None if pd.isna(v) else v.to_pydatetime() for v in values])
+        else:
+            columns.append(values.astype(object).where(values.notna(), None).tolist())
+    return zip(*columns)
+
+
+class XlsxWriterBook:
+    def __init__(self, path):
+        import xlsxwriter
+
+        self.book = xlsxwriter.Workbook(path, {"constant_memory": True})
+        self.date_format = self.book.add_format({"num_format": "yyyy-mm-dd"})
+
+    def add_sheet(self, name, frame):
+        # constant_memory flushes each row once the next starts, so cells go strictly row by
+        # row; the per-cell writer is chosen once per column instead of per value
+        sheet = self.book.add_worksheet(name)
+        sheet.write_row(0, 0, [str(c) for c in frame.columns])
+        writers = []
+        for column in frame.columns:
+            values = frame[column]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                writers.append(lambda r, c, v: sheet.write_datetime(r, c, v, self.date_format))
+            elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                writers.append(sheet.write_number)
+            else:
+                writers.append(sheet.write)
+        for r, row in enumerate(cells(frame), start=1):
+            for c, value in enumerate(row):
+                if value is not None:
+                    writers[c](r, c, value)
+
+    def close(self):
+        self.book.close()
+
+
+class OpenpyxlBook:
+    def __init__(self, path):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.book = Workbook(write_only=True)
+
+    def add_sheet(self, name, frame):
+        sheet = self.book.create_sheet(name)
+        sheet.append([str(c) for c in frame.columns])
+        for row in cells(frame):
+            sheet.append(row)
+
+    def close(self):
+        self.book.save(self.path)
+
+
+def excel_book(path):
+    for book in (XlsxWriterBook, OpenpyxlBook):
+        try:
+            return book(path)
+        except ImportError:
+            continue
+    raise ImportError("Excel export needs xlsxwriter or openpyxl; use export_bulk for CSV/Parquet")
+
+
+def export_excel(path, features, panels, tickers=None, ohlcv_sheets=MAX_OHLCV_SHEETS):
+    """Summary (one row per ticker), Close History (date x ticker) and one OHLCV sheet per
+    ticker for the first `ohlcv_sheets` tickers, written in a single streaming pass."""
+    tickers = list(features['ticker'] if tickers is None else tickers)
+    book = excel_book(path)
+    try:
+        summary = summary_frame(features, panels["Close"], tickers)
+        book.add_sheet("Summary", summary)
+        closes = panels["Close"].reindex(columns=tickers).dropna(how="all").reset_index()
+        book.add_sheet("Close History", closes)
+        fields = [f for f in PRICE_FIELDS if f in panels]
+        for ticker in tickers[:ohlcv_sheets]:
+            ohlcv = pd.DataFrame({f: panels[f][ticker] for f in fields if ticker in panels[f]})
+            if ohlcv.empty:
+                continue
+            ohlcv = ohlcv[ohlcv["Close"].notna()].rename_axis("Date").reset_index()
+            book.add_sheet(f"{ticker} OHLCV"[:31], ohlcv)
+    finally:
+        book.close()
+    return path
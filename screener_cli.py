@@ -0,0 +1,272 @@
+import argparse
+import datetime as dt
+import json
+import os
+import sqlite3
+import sys
+
+from strategies import STRATEGIES
+
+# Command-line entry point: python screener_cli.py {screen,export,backtest,watch,cache-status} ...
+# Only the standard library and strategies.py (itself stdlib-only) load at startup; numpy,
+# pandas, yfinance and the engine are imported inside the commands that need them, so
+# `--help` and `cache-status` start without them. Importing this module has no side effects.
+
+UNIVERSE_CSV = "sp500_tickers.csv"
+PRICE_CACHE_DIR = ".price_cache"  # same defaults as price_cache / fundamentals_cache / feature_store
+FUNDAMENTALS_CACHE = ".fundamentals_cache.sqlite"
+SNAPSHOT_DIR = ".feature_store"
+LOOKBACK_YEARS = 3
+FETCH_WORKERS = 8
+REQUESTS_PER_SECOND = 4.0
+POLL_INTERVAL = 60.0  # intraday.POLL_INTERVAL
+
+
+def parse_weight(text):
+    name, sep, value = text.partition("=")
+    try:
+        if not sep:
+            raise ValueError
+        return name.strip(), float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected component=weight, got '{text}'")
+
+
+def build_strategy(args, parser):
+    strategy = STRATEGIES[args.strategy]()
+    weights = dict(args.weight or [])
+    unknown = set(weights) - set(strategy.components)
+    if unknown:
+        parser.error(f"unknown components for {args.strategy}: {', '.join(sorted(unknown))} "
+                     f"(has {', '.join(strategy.components)})")
+    strategy.score_weights.update(weights)
+    if args.max_pe is not None:
+        strategy.filters = [(c, op, args.max_pe if c == 'pe' else t) for c, op, t in strategy.filters]
+    if args.top_n:
+        strategy.top_n = args.top_n
+    return strategy
+
+
+def make_engine(args, profile=None):
+    from screening_engine import ScreeningEngine, load_tickers
+
+    return ScreeningEngine(load_tickers(args.universe), years=args.lookback, price_cache_dir=args.price_cache,
+                           fundamentals_cache=args.fundamentals_cache, refresh_fundamentals=args.refresh,
+                           fetch_workers=args.fetch_workers, requests_per_second=args.requests_per_second,
+                           compute_workers=args.compute_workers, snapshot_dir=args.snapshot_dir, profile=profile)
+
+
+def cmd_screen(args, parser):
+    from profiling import RunProfile
+    from screening_engine import print_result
+
+    strategy = build_strategy(args, parser)
+    engine = make_engine(args, RunProfile(cprofile=args.cprofile))
+    try:
+        result = engine.run([strategy])[strategy.name]
+        if result.candidates.empty:
+            print(f"No candidates for {strategy.name}. Try a wider universe or looser filters.", file=sys.stderr)
+            return 1
+        print_result(result)
+        if args.diversify is not None:
+            print(f"\nDiversified (correlation penalty {args.diversify}):")
+            print(engine.diversify(strategy.name, penalty=args.diversify).to_string(index=False))
+        print(engine.fetch_summary())
+        if args.profile:
+            engine.write_profile(args.profile)
+            if args.cprofile:
+                engine.profile.dump_cprofile(os.path.splitext(args.profile)[0] + ".prof")
+    finally:
+        engine.close()
+    return 0
+
+
+def cmd_export(args, parser):
+    engine = make_engine(args)
+    try:
+        name = None
+        if args.strategy:
+            strategy = build_strategy(args, parser)
+            engine.run([strategy])
+            name = strategy.name
+        output = args.output or ("report.xlsx" if args.format == "xlsx" else "reports")
+        written = engine.export(output, name, args.format)
+    finally:
+        engine.close()
+    print("Wrote " + ", ".join(map(str, written if isinstance(written, tuple) else [written])))
+    return 0
+
+
+def cmd_backtest(args, parser):
+    from backtest import backtest
+    from fundamentals_cache import CATEGORY_FIELDS, FUNDAMENTAL_FIELDS
+
+    strategy = build_strategy(args, parser)
+    engine = make_engine(args)
+    try:
+        fundamentals = None
+        if args.with_fundamentals:
+            # Today's fundamentals broadcast to every rebalance date: look-ahead bias, see
+            # backtest.py. Price features always come from the point-in-time history.
+            features = engine.build_feature_matrix().set_index('ticker')
+            fundamentals = features[[c for c in [*FUNDAMENTAL_FIELDS, *CATEGORY_FIELDS] if c in features]]
+            close_panel = engine.close_panel
+        else:
+            close_panel = engine.price_cache.load(engine.tickers)["Close"]
+    finally:
+        engine.close()
+    result = backtest(close_panel, strategy, fundamentals, frequency=args.frequency, top_n=strategy.top_n)
+    for key, value in result.summary().items():
+        print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
+    return 0
+
+
+def cmd_watch(args, parser):
+    from intraday import PollingSource, TickFile
+
+    strategy = build_strategy(args, parser)
+    engine = make_engine(args)
+    try:
+        engine.run([strategy])
+    finally:
+        engine.close()
+
+    def publish(event):
+        left = f" (out: {event['left']})" if event["left"] else ""
+        print(f"{event['timestamp']} in: {event['entered']}{left} | " + " ".join(t for t, _ in event["top"]), flush=True)
+
+    live = engine.intraday(strategy.name, publish=publish, session=args.session)
+    print(live.top().to_string(index=False))
+    source = TickFile(args.ticks, realtime=args.realtime, speed=args.speed) if args.ticks \
+        else PollingSource(live.tickers, interval=args.interval)
+    try:
+        live.run(source)
+    except KeyboardInterrupt:
+        pass
+    print(live.top().to_string(index=False))
+    print(json.dumps(live.report()))
+    return 0
+
+
+def price_cache_status(directory):
+    path = os.path.join(directory, "index.json")
+    if not os.path.exists(path):
+        return {"directory": directory, "tickers": 0}
+    with open(path) as f:
+        index = json.load(f)
+    last = sorted(entry["last_date"] for entry in index.values())
+    today = dt.date.today().isoformat()
+    return {
+        "directory": directory,
+        "tickers": len(index),
+        "oldest_last_date": last[0] if last else None,
+        "newest_last_date": last[-1] if last else None,
+        "checked_today": sum(entry["checked"] == today for entry in index.values()),
+        "size_mb": round(sum(e.stat().st_size for e in os.scandir(directory) if e.is_file()) / 1e6, 1),
+    }
+
+
+def fundamentals_cache_status(path):
+    if not os.path.exists(path):
+        return {"path": path, "tickers": 0}
+    db = sqlite3.connect(path)
+    try:
+        tickers, rows, oldest, newest = db.execute(
+            "SELECT COUNT(DISTINCT ticker), COUNT(*), MIN(fetched_at), MAX(fetched_at) FROM fundamentals").fetchone()
+    finally:
+        db.close()
+    stamp = lambda t: dt.datetime.fromtimestamp(t).isoformat(timespec="seconds") if t else None
+    return {"path": path, "tickers": tickers, "rows": rows, "oldest_fetch": stamp(oldest), "newest_fetch": stamp(newest),
+            "size_mb": round(os.path.getsize(path) / 1e6, 1)}
+
+
+def cmd_cache_status(args, parser):
+    snapshot_dir = args.snapshot_dir or SNAPSHOT_DIR
+    snapshots = sorted(os.listdir(snapshot_dir)) if os.path.isdir(snapshot_dir) else []
+    status = {
+        "prices": price_cache_status(args.price_cache),
+        "fundamentals": fundamentals_cache_status(args.fundamentals_cache),
+        "snapshots": [s for s in snapshots if s.endswith(".fstore")],
+    }
+    if args.json:
+        print(json.dumps(status, indent=2))
+        return 0
+    for section in ("prices", "fundamentals"):
+        print(f"{section}: " + ", ".join(f"{k}={v}" for k, v in status[section].items()))
+    snapshots = status["snapshots"]
+    print(f"snapshots: {len(snapshots)}" + (f" (latest {snapshots[-1]})" if snapshots else ""))
+    return 0
+
+
+def add_data_options(parser):
+    parser.add_argument("--universe", default=UNIVERSE_CSV, help="CSV with a Symbol column (default: %(default)s)")
+    parser.add_argument("--lookback", type=int, default=LOOKBACK_YEARS, help="years of price history")
+    parser.add_argument("--refresh", action="store_true", help="ignore fundamentals cache TTLs")
+    parser.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    parser.add_argument("--requests-per-second", type=float, default=REQUESTS_PER_SECOND)
+    parser.add_argument("--compute-workers", type=int, default=1, help="processes for price features")
+
+
+def add_strategy_options(parser, required=True):
+    parser.add_argument("--strategy", choices=list(STRATEGIES), required=required)
+    parser.add_argument("--weight", type=parse_weight, action="append", metavar="COMPONENT=W",
+                        help="override a component weight, e.g. --weight dip=1.0 (repeatable)")
+    parser.add_argument("--max-pe", type=float, help="PE cap for strategies that filter on PE")
+    parser.add_argument("--top-n", type=int)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="screener", description="Stock screens over the cached S&P 500 universe.")
+    parser.add_argument("--price-cache", default=PRICE_CACHE_DIR)
+    parser.add_argument("--fundamentals-cache", default=FUNDAMENTALS_CACHE)
+    parser.add_argument("--snapshot-dir", help=f"save/read feature snapshots here (e.g. {SNAPSHOT_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    screen = commands.add_parser("screen", help="run one strategy and print its top-N")
+    add_strategy_options(screen)
+    add_data_options(screen)
+    screen.add_argument("--diversify", type=float, metavar="PENALTY", help="also print a correlation-aware top-N")
+    screen.add_argument("--profile", metavar="JSON", help="write a run profile (timings, calls, cache ratios)")
+    screen.add_argument("--cprofile", action="store_true", help="cProfile the compute stages (with --profile)")
+    screen.set_defaults(run=cmd_screen)
+
+    export = commands.add_parser("export", help="write reports for a strategy's top-N or the whole universe")
+    add_strategy_options(export, required=False)
+    add_data_options(export)
+    export.add_argument("--format", choices=["csv", "parquet", "xlsx"], default="csv")
+    export.add_argument("--output", help="directory for csv/parquet, file for xlsx")
+    export.set_defaults(run=cmd_export)
+
+    backtest = commands.add_parser("backtest", help="point-in-time backtest of a strategy on cached prices")
+    add_strategy_options(backtest)
+    add_data_options(backtest)
+    backtest.add_argument("--frequency", choices=["monthly", "weekly"], default="monthly")
+    backtest.add_argument("--with-fundamentals", action="store_true",
+                          help="broadcast today's fundamentals to every date (look-ahead bias)")
+    backtest.set_defaults(run=cmd_backtest)
+
+    watch = commands.add_parser("watch", help="keep a strategy's top-N current from live or replayed prices")
+    add_strategy_options(watch)
+    add_data_options(watch)
+    watch.add_argument("--ticks", metavar="CSV", help="replay a timestamp,ticker,price tick file instead of polling")
+    watch.add_argument("--realtime", action="store_true", help="replay --ticks at their recorded pace")
+    watch.add_argument("--speed", type=float, default=1.0, help="replay speed-up with --realtime")
+    watch.add_argument("--interval", type=float, default=POLL_INTERVAL, help="seconds between polls of the live prices")
+    watch.add_argument("--session", type=dt.date.fromisoformat, metavar="YYYY-MM-DD",
+                       help="trading day of the ticks, to replay an earlier one (default: today in New York)")
+    watch.set_defaults(run=cmd_watch)
+
+    status = commands.add_parser("cache-status", help="summarize the price, fundamentals and snapshot caches")
+    status.add_argument("--json", action="store_true")
+    status.set_defaults(run=cmd_cache_status)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    return args.run(args, parser)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
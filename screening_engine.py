@@ -0,0 +1,348 @@
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from diversification import DIVERSIFICATION_PENALTY, diversified_top
+from feature_store import FeatureStore, save_snapshot
+from fetch_scheduler import MAX_WORKERS, REQUESTS_PER_SECOND, FetchScheduler
+from fundamentals_cache import CACHE_PATH as FUNDAMENTALS_CACHE
+from fundamentals_cache import (CACHED_FIELDS, CATEGORY_FIELDS, FUNDAMENTAL_FIELDS, MAX_TICKERS, FundamentalsCache,
+                                empty_fundamentals)
+from grouped_scores import grouped_zscore
+from indicators import INDICATORS
+from intraday import IntradayScreen
+from market_data import LOOKBACK_YEARS, PRICE_FIELDS, BenchmarkProvider
+from parallel_features import COMPUTE_WORKERS, parallel_price_features
+from price_cache import CACHE_DIR as PRICE_CACHE_DIR, PriceCache
+from profiling import RunProfile, hit_ratio
+from report_export import export_bulk, export_excel
+from strategies import OPERATORS, STRATEGIES
+from streaming import cached_feature_rows, stream_top_n
+
+TICKERS_CSV = "sp500_tickers.csv"
+
+
+def load_tickers(path=TICKERS_CSV):
+    return pd.read_csv(path)['Symbol'].tolist()
+
+
+def zscore(values):
+    return (values - values.mean()) / values.std()
+
+
+def top_n_indices(scores, n):
+    # Positions of the n highest scores, best first. argpartition is O(len) where a full
+    # sort is O(len log len); only the n survivors get sorted. NaN scores rank last.
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    n = min(n, len(scores))
+    if n == 0:
+        return np.array([], dtype=int)
+    top = np.argpartition(-scores, n - 1)[:n]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def select_candidates(features, strategy, complete=None, on_drop=None):
+    # `complete` is the frame already reduced to rows with every required column present.
+    # `on_drop(step, rows_in, rows_out)` is told how many rows each step removed.
+    df = features.dropna(subset=strategy.required) if complete is None else complete
+    if on_drop:
+        on_drop("required", len(features), len(df))
+    for column, op, threshold in strategy.filters:
+        before = len(df)
+        df = df[OPERATORS[op](df[column], threshold)]
+        if on_drop:
+            on_drop(f"{column} {op} {threshold}", before, len(df))
+    return df
+
+
+def standardize(candidates, values, kind):
+    # "z" over all candidates; "<method>:<group column>" within each group (grouped_scores)
+    if kind == 'z':
+        return zscore(values)
+    if kind == 'raw':
+        return values
+    method, _, group = kind.partition(':')
+    groups = candidates[group] if group in candidates else pd.Series(None, index=candidates.index, dtype=object)
+    return pd.Series(grouped_zscore(values.to_numpy(dtype=np.float64), groups, method), index=values.index)
+
+
+def component_matrix(candidates, strategy):
+    # One column per strategy component, z-scores taken over the candidate rows only
+    components = {}
+    for name, terms in strategy.components.items():
+        total = 0.0
+        for column, coef, kind in terms:
+            values = pd.to_numeric(candidates[column], errors='coerce')
+            total = total + coef * standardize(candidates, values, kind)
+        components[name] = total
+    return pd.DataFrame(components, index=candidates.index)
+
+
+class ScreenResult:
+    """A scored strategy. Keeps the standardized component matrix (candidates x components),
+    so a weight change is one matrix-vector product and needs no refetch or re-standardizing."""
+
+    def __init__(self, strategy, candidates, components):
+        self.strategy = strategy
+        self.candidates = candidates
+        self.components = components
+        self.matrix = components.to_numpy(dtype=np.float64)
+        self.rescore(strategy.score_weights)
+
+    def weight_vector(self, score_weights):
+        return np.array([score_weights.get(name, 0.0) for name in self.components.columns])
+
+    def rescore(self, score_weights):
+        self.strategy.score_weights = dict(score_weights)
+        self.candidates['score'] = self.matrix @ self.weight_vector(score_weights)
+        return self
+
+    @property
+    def top(self):
+        top = top_n_indices(self.candidates['score'].to_numpy(), self.strategy.top_n)
+        return self.candidates.iloc[top][self.strategy.display_columns]
+
+    def sweep(self, weight_sets, top_n=None):
+        """Score many weight vectors in one call. `weight_sets` is a list of score_weights
+        dicts or a DataFrame with one column per component; returns one row of top-N
+        tickers (best first) per weight vector."""
+        if isinstance(weight_sets, pd.DataFrame):
+            weight_sets = weight_sets.to_dict('records')
+        weights = np.column_stack([self.weight_vector(w) for w in weight_sets])
+        scores = self.matrix @ weights
+        top_n = min(top_n or self.strategy.top_n, len(scores))
+        if top_n == 0:
+            return pd.DataFrame(index=range(len(weight_sets)))
+        ranked = np.where(np.isnan(scores), -np.inf, scores)
+        top = np.argpartition(-ranked, top_n - 1, axis=0)[:top_n]
+        order = np.argsort(-np.take_along_axis(ranked, top, axis=0), axis=0, kind="stable")
+        top = np.take_along_axis(top, order, axis=0)
+        tickers = self.candidates['ticker'].to_numpy()[top.T]
+        return pd.DataFrame(tickers, columns=[f"rank_{i + 1}" for i in range(top_n)])
+
+
+def strategy_columns(strategies):
+    # Every feature column any of `strategies` reads: requirements, filters, terms, the
+    # groups of group-relative terms and display columns
+    columns = set()
+    for strategy in strategies:
+        columns.update(strategy.required, strategy.display_columns, (c for c, _, _ in strategy.filters))
+        for terms in strategy.components.values():
+            for column, _, kind in terms:
+                columns.update((column, kind.partition(':')[2]))
+    return columns
+
+
+def fundamental_fields(strategies):
+    # The CACHED_FIELDS any of `strategies` reads
+    return strategy_columns(strategies) & set(CACHED_FIELDS)
+
+
+def score_strategy(features, strategy, complete=None, on_drop=None):
+    candidates = select_candidates(features, strategy, complete, on_drop).copy()
+    return ScreenResult(strategy, candidates, component_matrix(candidates, strategy))
+
+
+class ScreeningEngine:
+    """Builds the feature matrix (fundamentals + price statistics) once, through the price
+    and fundamentals caches, and scores any number of strategies against it. The matrix is
+    held in a FeatureStore; with `snapshot_dir` each build is also saved there as a dated
+    snapshot that `use_store(load_snapshot(...))` can score later without fetching.
+    `compute_workers` > 1 computes the price features in a process pool (parallel_features).
+    Stage timings, provider call latencies and dropped-row counts go to `profile`
+    (profiling.RunProfile); see run_profile()/write_profile()."""
+
+    def __init__(self, tickers, years=LOOKBACK_YEARS, price_cache_dir=PRICE_CACHE_DIR,
+                 fundamentals_cache=FUNDAMENTALS_CACHE, refresh_fundamentals=False,
+                 fetch_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND,
+                 download=None, ticker_factory=None, snapshot_dir=None, compute_workers=COMPUTE_WORKERS,
+                 profile=None):
+        self.tickers = list(dict.fromkeys(tickers))
+        self.years = years
+        self.refresh_fundamentals = refresh_fundamentals
+        self.profile = profile or RunProfile()
+        download = download or yf.download
+        self.scheduler = FetchScheduler(max_workers=fetch_workers, rate=requests_per_second)
+        self.benchmarks = BenchmarkProvider(years=years, download=self.profile.timed("benchmark_download", download),
+                                            scheduler=self.scheduler)
+        self.price_cache = PriceCache(price_cache_dir, years=years, scheduler=self.scheduler,
+                                      download=self.profile.timed("price_download", download))
+        # The LRU bound never evicts part of the universe being screened
+        self.fundamentals_cache = FundamentalsCache(
+            fundamentals_cache, ticker_factory=ticker_factory, max_tickers=max(MAX_TICKERS, len(self.tickers)),
+            throttle=lambda fetch: self.scheduler.throttled(self.profile.timed("info", fetch)))
+        self.snapshot_dir = snapshot_dir
+        self.compute_workers = compute_workers
+        self.close_panel = None
+        self.store = None
+        self.features = None
+        self.results = {}
+        self.fundamental_fields = set()
+        self._complete = {}
+
+    def build_feature_matrix(self, fields=None):
+        """The feature matrix, built on first use. `fields` are the fundamentals
+        (FUNDAMENTAL_FIELDS / CATEGORY_FIELDS names) that must be fresh, default all; with
+        none the `.info` stage is skipped and those columns stay empty. Later calls only
+        fetch fundamentals when they need a field that has not been fetched yet."""
+        fields = set(CACHED_FIELDS if fields is None else fields) & set(CACHED_FIELDS)
+        if self.features is not None:
+            if fields - self.fundamental_fields:
+                fields |= self.fundamental_fields
+                fundamentals = self._fetch_fundamentals(fields)
+                with self.profile.stage("feature_store", compute=True):
+                    self._fill_fundamentals(self.store, fundamentals)
+                    self.use_store(self.store, fields)
+            return self.features
+        stage = self.profile.stage
+        with stage("prices"):
+            self.close_panel = self.price_cache.load(self.tickers)["Close"]
+        if self.price_cache.failed:
+            print(f"No price data for {len(self.price_cache.failed)} tickers: {', '.join(self.price_cache.failed)}")
+        with stage("benchmark"):
+            benchmark = self.benchmarks.returns()
+        with stage("price_features", compute=True):
+            stats = parallel_price_features(self.close_panel, benchmark, workers=self.compute_workers)
+
+        fundamentals = self._fetch_fundamentals(fields) if fields else None
+        with stage("feature_store", compute=True):
+            store = FeatureStore(self.tickers, list(FUNDAMENTAL_FIELDS) + list(stats.columns), list(CATEGORY_FIELDS))
+            if fundamentals is not None:
+                self._fill_fundamentals(store, fundamentals)
+            for column in stats.columns:
+                store.set_column(column, stats[column].reindex(self.tickers))
+            self.use_store(store, fields)
+        if self.snapshot_dir is not None:
+            with stage("snapshot"):
+                save_snapshot(store, self.snapshot_dir)
+        if self.scheduler.failures:
+            print(self.scheduler.report())
+        return self.features
+
+    def _fetch_fundamentals(self, fields):
+        with self.profile.stage("fundamentals"):
+            fundamentals = self.scheduler.map(
+                lambda ticker: self.fundamentals_cache.get(ticker, refresh=self.refresh_fundamentals, fields=fields),
+                self.tickers, default=empty_fundamentals())
+        self.fundamentals_cache.evict()
+        return fundamentals
+
+    def _fill_fundamentals(self, store, fundamentals):
+        for column in FUNDAMENTAL_FIELDS:
+            store.set_column(column, [row[column] for row in fundamentals])
+        for column in CATEGORY_FIELDS:
+            store.set_categories(column, [row[column] for row in fundamentals])
+
+    def use_store(self, store, fields=None):
+        # Score from a FeatureStore (e.g. a saved snapshot) instead of fetching. `fields` are
+        # the fundamentals it holds, default all.
+        self.store = store
+        self.fundamental_fields = set(CACHED_FIELDS if fields is None else fields)
+        self.features = store.to_frame()
+        self._complete = {}
+        return self.features
+
+    def run(self, strategies):
+        # Re-running with new thresholds only re-filters and re-standardizes the candidate
+        # rows; the feature matrix and the required-column dropna are reused.
+        features = self.build_feature_matrix(fundamental_fields(strategies))
+        for strategy in strategies:
+            with self.profile.stage(f"score:{strategy.name}", compute=True):
+                key = tuple(strategy.required)
+                if key not in self._complete:
+                    self._complete[key] = features[self.store.valid(strategy.required)]
+                on_drop = lambda step, before, after, name=strategy.name: \
+                    self.profile.record_drop(name, step, before, after)
+                self.results[strategy.name] = score_strategy(features, strategy, self._complete[key], on_drop)
+        return {strategy.name: self.results[strategy.name] for strategy in strategies}
+
+    def rescore(self, name, score_weights):
+        return self.results[name].rescore(score_weights)
+
+    def closes(self):
+        # The close panel of the last build; after use_store(snapshot) the cached closes on
+        # disk, read once without fetching
+        if self.close_panel is None:
+            closes = self.price_cache.cached_panel(self.tickers, ["Close"])["Close"]
+            if closes.dropna(how='all').empty:
+                raise ValueError(f"No cached prices in {self.price_cache.directory}; build the feature matrix "
+                                 "instead of scoring a snapshot")
+            self.close_panel = closes
+        return self.close_panel
+
+    def diversify(self, name, top_n=None, penalty=DIVERSIFICATION_PENALTY, shrink=True):
+        # Top-N of a scored strategy traded off against return correlation (diversification.py)
+        return diversified_top(self.results[name], self.closes(), top_n, penalty, shrink)
+
+    def intraday(self, name, top_n=None, publish=None, session=None):
+        # Live top-N of scored strategy `name`, rescored tick by tick (intraday.py)
+        return IntradayScreen(self.results[name], self.closes(), top_n, publish, session)
+
+    def export(self, target, name=None, format="csv"):
+        """Reports from the data already loaded: the top-N of strategy `name` (with scores),
+        or the whole universe when `name` is None. `format` "xlsx" writes one workbook at
+        `target`; "csv"/"parquet" write summary + long OHLCV tables into directory `target`."""
+        features = self.results[name].candidates if name else self.build_feature_matrix()
+        tickers = list(self.results[name].top['ticker']) if name else self.tickers
+        with self.profile.stage("export"):
+            panels = self.price_cache.cached_panel(tickers, PRICE_FIELDS)
+            if format == "xlsx":
+                return export_excel(target, features, panels, tickers)
+            return export_bulk(target, features, panels, tickers, format)
+
+    def stream(self, strategy, top_n=None):
+        # Streaming alternative to run() for very large universes: rows are read from the
+        # caches one ticker at a time instead of building the feature matrix.
+        self.price_cache.update(self.tickers)
+        benchmark = self.benchmarks.returns()
+        columns = strategy_columns([strategy])
+        rows = lambda: cached_feature_rows(self.tickers, self.price_cache, self.fundamentals_cache, benchmark,
+                                           self.scheduler.failures, columns & set(CACHED_FIELDS),
+                                           indicators=bool(columns & set(INDICATORS)))
+        top, _ = stream_top_n(rows, strategy, top_n)
+        return top
+
+    def close(self):
+        self.fundamentals_cache.close()
+
+    def run_profile(self):
+        """JSON-ready run profile: stage timings, provider latencies, drops, cache ratios."""
+        cache = self.fundamentals_cache
+        self.profile.count("tickers", len(self.tickers))
+        self.profile.count("fundamentals_cache", {"hits": cache.hits, "misses": cache.misses,
+                                                  "hit_ratio": hit_ratio(cache.hits, cache.misses)})
+        prices = dict(self.price_cache.stats)
+        prices["hit_ratio"] = hit_ratio(prices.get("fresh", 0), sum(prices.values()) - prices.get("fresh", 0))
+        self.profile.count("price_cache", prices)
+        self.profile.count("benchmark_fetches", self.benchmarks.fetch_count)
+        self.profile.count("fetch_retries", self.scheduler.retries)
+        self.profile.count("failures", {"prices": list(self.price_cache.failed),
+                                        "fundamentals": dict(self.scheduler.failures)})
+        return self.profile.report()
+
+    def write_profile(self, path):
+        self.run_profile()
+        return self.profile.write(path)
+
+    def fetch_summary(self):
+        cache = self.fundamentals_cache
+        return (f"Benchmark fetches this run: {self.benchmarks.fetch_count}\n"
+                f"Fundamentals .info calls this run: {cache.info_calls} ({cache.hits} cache hits)")
+
+
+def print_result(result):
+    print(f"{result.strategy.count_label}: {len(result.candidates)}")
+    print(result.strategy.title)
+    print(result.top.to_string(index=False))
+
+
+if __name__ == "__main__":
+    # All three screens from a single fetch of the universe
+    engine = ScreeningEngine(load_tickers())
+    try:
+        for result in engine.run([factory() for factory in STRATEGIES.values()]).values():
+            print_result(result)
+            print()
+        print(engine.fetch_summary())
+    finally:
+        engine.close()
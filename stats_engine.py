@@ -0,0 +1,102 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+STAT_FEATURES = ["volatility", "sharpe", "momentum_1m", "momentum_3m", "drawdown", "beta"]
+MIN_HISTORY = 60
+TRADING_DAYS = 252
+
+
+def pack_valid(values):
+    # Stable-sort each column so its valid closes sit at the bottom in date order and the
+    # NaNs at the top. Each column then behaves like `closes.dropna()` for that ticker.
+    valid = ~np.isnan(values)
+    order = np.argsort(valid, axis=0, kind="stable")
+    return np.take_along_axis(values, order, axis=0), order, valid.sum(axis=0)
+
+
+def compute_statistical_features(close_panel, benchmark_returns=None):
+    """Volatility, Sharpe, 1M/3M momentum, max drawdown and beta for every column of a
+    date x ticker close panel at once. Matches the per-ticker `ticker_statistical_features`
+    (the original script logic) to floating-point rounding."""
+    closes = close_panel.to_numpy(dtype=np.float64)
+    n_days, n_tickers = closes.shape
+    out = np.full((n_tickers, len(STAT_FEATURES)), np.nan)
+    if n_days < 2:
+        return pd.DataFrame(out, index=close_panel.columns, columns=STAT_FEATURES)
+    packed, order, counts = pack_valid(closes)
+    returns = packed[1:] / packed[:-1] - 1
+
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # Columns with no data give all-NaN slices; they are masked out below anyway
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(returns, axis=0)
+        std = np.nanstd(returns, axis=0, ddof=1)
+        volatility = std * np.sqrt(TRADING_DAYS)
+        sharpe = mean / std * np.sqrt(TRADING_DAYS)
+        momentum_1m = returns[-20:].sum(axis=0)
+        momentum_3m = returns[-62:].sum(axis=0)
+        drawdown = np.nanmin(packed / np.fmax.accumulate(packed, axis=0) - 1, axis=0)
+    momentum_1m[counts < 21] = np.nan
+    momentum_3m[counts < 63] = np.nan
+
+    if benchmark_returns is not None:
+        # Scatter the packed returns back onto the calendar so beta pairs each return with
+        # the benchmark return of the same date.
+        dated = np.full_like(closes, np.nan)
+        np.put_along_axis(dated, order[1:], returns, axis=0)
+        bench = benchmark_returns.reindex(close_panel.index).to_numpy(dtype=np.float64)
+        beta = masked_beta(dated, bench)
+    else:
+        beta = np.full(n_tickers, np.nan)
+
+    out[:] = np.column_stack([volatility, sharpe, momentum_1m, momentum_3m, drawdown, beta])
+    usable = (counts >= MIN_HISTORY) & (std > 0)
+    out[~usable] = np.nan
+    return pd.DataFrame(out, index=close_panel.columns, columns=STAT_FEATURES)
+
+
+def masked_beta(returns, bench):
+    # cov(r, b) with ddof=1 over var(b) with ddof=0, per column, using only dates where
+    # both the ticker and the benchmark have a return (same formula as the scripts).
+    mask = ~np.isnan(returns) & ~np.isnan(bench)[:, None]
+    n = mask.sum(axis=0)
+    r = np.where(mask, returns, 0.0)
+    b = np.where(mask, np.nan_to_num(bench)[:, None], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r_mean = r.sum(axis=0) / n
+        b_mean = b.sum(axis=0) / n
+        rc = np.where(mask, r - r_mean, 0.0)
+        bc = np.where(mask, b - b_mean, 0.0)
+        cov = (rc * bc).sum(axis=0) / (n - 1)
+        var = (bc * bc).sum(axis=0) / n
+        beta = cov / var
+    beta[(n < 2) | (var == 0)] = np.nan
+    return beta
+
+
+def ticker_statistical_features(closes, benchmark_returns=None):
+    # Per-ticker reference path (one Series at a time), kept for parity checks and for
+    # callers that only have a single ticker's history.
+    closes = closes.dropna()
+    if len(closes) < MIN_HISTORY:
+        return {k: np.nan for k in STAT_FEATURES}
+    returns = closes.pct_change().dropna()
+    if returns.empty or returns.std() == 0:
+        return {k: np.nan for k in STAT_FEATURES}
+    beta = np.nan
+    if benchmark_returns is not None:
+        sr = benchmark_returns.reindex(returns.index).to_numpy(dtype=float)
+        mask = ~np.isnan(sr)
+        if mask.sum() >= 2:
+            r, sr = returns.to_numpy(dtype=float)[mask], sr[mask]
+            beta = np.cov(r, sr)[0][1] / np.var(sr) if np.var(sr) != 0 else np.nan
+    return {
+        "volatility": returns.std() * np.sqrt(TRADING_DAYS),
+        "sharpe": returns.mean() / returns.std() * np.sqrt(TRADING_DAYS),
+        "momentum_1m": closes[-21:].pct_change().sum() if len(closes) >= 21 else np.nan,
+        "momentum_3m": closes[-63:].pct_change().sum() if len(closes) >= 63 else np.nan,
+        "drawdown": (closes / closes.cummax() - 1).min(),
+        "beta": beta,
+    }
@@ -0,0 +1,130 @@
+import operator
+from dataclasses import dataclass, field
+
+RISK_AVERSION_LAMBDA = 1.0
+MAX_PE = 30
+
+OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+@dataclass
+class Strategy:
+    """A screen over the shared feature matrix.
+
+    `components` maps a component name to the terms summed into it, each term being
+    (feature, coefficient, kind): "z" terms are standardized over the rows that pass
+    `required` (dropna) and `filters`; "raw" terms are used as they are; "<method>:<group>"
+    terms (e.g. "z:sector", "rank:industry", "winsor:sector") are standardized within each
+    value of the `group` column, see grouped_scores.grouped_zscore. The score is the
+    `score_weights`-weighted sum of the components."""
+
+    name: str
+    title: str
+    required: list
+    components: dict
+    score_weights: dict
+    display_columns: list
+    filters: list = field(default_factory=list)
+    top_n: int = 10
+    count_label: str = "Total candidates"
+
+
+def strongest_bets(risk_aversion=RISK_AVERSION_LAMBDA):
+    # v6: standardized Sharpe minus lambda * standardized volatility
+    return Strategy(
+        name="strongest_bets",
+        title="Top 10 Strongest Bets:",
+        required=['sharpe', 'volatility'],
+        components={
+            'sharpe': [('sharpe', 1.0, 'z')],
+            'volatility': [('volatility', 1.0, 'z')],
+        },
+        score_weights={'sharpe': 1.0, 'volatility': -risk_aversion},
+        display_columns=['ticker', 'sharpe', 'volatility', 'score'],
+        count_label="Total stocks with valid sharpe & volatility",
+    )
+
+
+def bargain_quality(risk_aversion=RISK_AVERSION_LAMBDA):
+    # v7: quality (ROE, growth) + value (inverse PE) + raw Sharpe - lambda * raw volatility
+    return Strategy(
+        name="bargain_quality",
+        title="Top 10 Bargain Quality Stocks:",
+        required=['sharpe', 'volatility', 'pe', 'roe', 'revenue_growth', 'eps_growth'],
+        components={
+            'quality': [('roe', 1.0, 'z'), ('revenue_growth', 1.0, 'z'), ('eps_growth', 1.0, 'z')],
+            'value': [('pe', -1.0, 'z')],
+            'sharpe': [('sharpe', 1.0, 'raw')],
+            'volatility': [('volatility', 1.0, 'raw')],
+        },
+        score_weights={'quality': 1.0, 'value': 1.0, 'sharpe': 1.0, 'volatility': -risk_aversion},
+        display_columns=['ticker', 'score', 'pe', 'roe', 'revenue_growth', 'eps_growth', 'sharpe', 'volatility'],
+        count_label="Total stocks with valid quality & value metrics",
+    )
+
+
+def dip_bargains(max_pe=MAX_PE, risk_aversion=RISK_AVERSION_LAMBDA):
+    # v8: quality + value + dip (negative recent momentum) + distance from highs, PE capped
+    return Strategy(
+        name="dip_bargains",
+        title="Top 10 Bargain Dip Candidates (Quality + Dip):",
+        required=['sharpe', 'volatility', 'pe', 'roe', 'revenue_growth', 'eps_growth',
+                  'momentum_1m', 'momentum_3m', 'drawdown'],
+        filters=[('pe', '<', max_pe)],
+        components={
+            'quality': [('roe', 1.0, 'z'), ('revenue_growth', 1.0, 'z'), ('eps_growth', 1.0, 'z')],
+            'value': [('pe', -1.0, 'z')],
+            'dip': [('momentum_1m', -0.5, 'raw'), ('momentum_3m', -0.5, 'raw')],
+            'off_high': [('drawdown', -1.0, 'raw')],
+            'sharpe': [('sharpe', 1.0, 'raw')],
+            'volatility': [('volatility', 1.0, 'raw')],
+        },
+        score_weights={
+            'quality': 1.0,
+            'value': 1.0,
+            'dip': 0.7,
+            'off_high': 0.7,
+            'sharpe': 0.5,
+            'volatility': -risk_aversion,
+        },
+        display_columns=['ticker', 'score', 'pe', 'roe', 'revenue_growth', 'eps_growth', 'sharpe', 'volatility',
+                         'momentum_1m', 'momentum_3m', 'drawdown'],
+        count_label="Total bargain candidates with valid dip metrics",
+    )
+
+
+def dip_technical(max_pe=MAX_PE, risk_aversion=RISK_AVERSION_LAMBDA, oversold_weight=0.5, below_trend_weight=0.5):
+    # v8 plus technicals from indicators.py: a low RSI and a price under its 50-day average
+    # both count as a deeper dip
+    strategy = dip_bargains(max_pe=max_pe, risk_aversion=risk_aversion)
+    strategy.name = "dip_technical"
+    strategy.title = "Top 10 Bargain Dip Candidates (Quality + Dip + Technicals):"
+    strategy.required += ['rsi_14', 'sma_gap_50']
+    strategy.components['oversold'] = [('rsi_14', -1.0, 'z')]
+    strategy.components['below_trend'] = [('sma_gap_50', -1.0, 'z')]
+    strategy.score_weights['oversold'] = oversold_weight
+    strategy.score_weights['below_trend'] = below_trend_weight
+    strategy.display_columns += ['rsi_14', 'sma_gap_50']
+    return strategy
+
+
+def sector_relative(strategy, group="sector", method="z", columns=("pe", "roe", "revenue_growth", "eps_growth")):
+    # Re-standardize the valuation/quality terms against the ticker's own sector (or
+    # industry), so a bank's PE is compared with other banks rather than with software
+    strategy.name += f"_{group}"
+    strategy.title = strategy.title.replace(":", f" (relative to {group}):", 1)
+    strategy.components = {name: [(column, coef, f"{method}:{group}" if kind == 'z' and column in columns else kind)
+                                  for column, coef, kind in terms]
+                           for name, terms in strategy.components.items()}
+    strategy.display_columns.insert(1, group)
+    return strategy
+
+
+STRATEGIES = {
+    "strongest_bets": strongest_bets,
+    "bargain_quality": bargain_quality,
+    "dip_bargains": dip_bargains,
+    "dip_technical": dip_technical,
+    "bargain_quality_sector": lambda: sector_relative(bargain_quality()),
+    "dip_bargains_sector": lambda: sector_relative(dip_bargains()),
+}
@@ -0,0 +1,142 @@
+import heapq
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from fundamentals_cache import empty_fundamentals
+from indicators import latest_indicators
+from stats_engine import ticker_statistical_features
+from strategies import OPERATORS
+
+# Streaming screen: feature rows flow through generators and are never collected into one
+# DataFrame. Z-scores need the universe mean/std before any row can be scored, so the row
+# source is read twice: pass 1 feeds Welford accumulators, pass 2 scores each row and keeps
+# the best `top_n` in a bounded heap. Memory is O(top_n + features), not O(universe).
+
+STREAM_CHUNK = 500  # tickers per indicator computation in cached_feature_rows
+
+
+class RunningStats:
+    """Welford's running mean/variance for a fixed set of columns, updated one row at a time."""
+
+    def __init__(self, n_columns):
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+
+    def update(self, values):
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+
+    @property
+    def std(self):
+        # Sample std (ddof=1), like pandas
+        if self.count < 2:
+            return np.full_like(self.mean, np.nan)
+        return np.sqrt(self.m2 / (self.count - 1))
+
+
+class LinearScorer:
+    # A strategy flattened into per-feature coefficients: score = sum(raw_coef * x) +
+    # sum(weight * coef * (x - mean) / std) over the strategy's terms.
+
+    def __init__(self, strategy):
+        grouped = sorted({kind for terms in strategy.components.values() for _, _, kind in terms} - {'z', 'raw'})
+        if grouped:
+            raise ValueError(f"Streaming cannot score group-relative terms {grouped}; use the batch screen")
+        self.strategy = strategy
+        self.columns = list(dict.fromkeys(
+            list(strategy.required) + [c for c, _, _ in strategy.filters]
+            + [c for terms in strategy.components.values() for c, _, _ in terms]
+            + [c for c in strategy.display_columns if c not in ('ticker', 'score')]))
+        self.position = {c: i for i, c in enumerate(self.columns)}
+        self.required = np.array([self.position[c] for c in strategy.required], dtype=int)
+        self.z_columns = list(dict.fromkeys(
+            c for terms in strategy.components.values() for c, _, kind in terms if kind == 'z'))
+        self.z_positions = np.array([self.position[c] for c in self.z_columns], dtype=int)
+        self.raw_coef = np.zeros(len(self.columns))
+        self.z_coef = np.zeros(len(self.z_columns))
+        z_index = {c: i for i, c in enumerate(self.z_columns)}
+        for name, terms in strategy.components.items():
+            weight = strategy.score_weights.get(name, 0.0)
+            for column, coef, kind in terms:
+                if kind == 'z':
+                    self.z_coef[z_index[column]] += weight * coef
+                else:
+                    self.raw_coef[self.position[column]] += weight * coef
+        self.stats = RunningStats(len(self.z_columns))
+
+    def values(self, row):
+        return np.array([pd.to_numeric(row.get(c, np.nan), errors='coerce') for c in self.columns], dtype=np.float64)
+
+    def passes(self, values):
+        if np.isnan(values[self.required]).any():
+            return False
+        return all(OPERATORS[op](values[self.position[c]], t) for c, op, t in self.strategy.filters)
+
+    def score(self, values):
+        z = (values[self.z_positions] - self.stats.mean) / self.stats.std
+        return float(self.raw_coef @ values + self.z_coef @ z)
+
+
+def stream_top_n(rows, strategy, top_n=None):
+    """`rows` is a zero-argument callable returning an iterable of feature dicts (each with a
+    'ticker'); it is called twice. Returns the same top-N frame as the batch screen."""
+    scorer = LinearScorer(strategy)
+    top_n = top_n or strategy.top_n
+    for row in rows():
+        values = scorer.values(row)
+        if scorer.passes(values):
+            scorer.stats.update(values[scorer.z_positions])
+
+    heap = []
+    order = itertools.count()
+    for row in rows():
+        values = scorer.values(row)
+        if not scorer.passes(values):
+            continue
+        score = scorer.score(values)
+        # Ties keep the earlier row, like the batch path's stable sort
+        item = (score, -next(order), row['ticker'], values)
+        if len(heap) < top_n:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    best = sorted(heap, reverse=True)
+    data = {c: [v[scorer.position[c]] for _, _, _, v in best] for c in scorer.columns}
+    data['ticker'] = [t for _, _, t, _ in best]
+    data['score'] = [s for s, _, _, _ in best]
+    return pd.DataFrame(data, columns=list(data))[strategy.display_columns], scorer.stats.count
+
+
+def cached_feature_rows(tickers, price_cache, fundamentals_cache, benchmark_returns=None, failures=None,
+                        fields=None, indicators=True, chunk_size=STREAM_CHUNK):
+    # One feature dict per ticker straight from the on-disk caches. `fields` are the
+    # fundamentals that must be fresh (default all); with none the cache is not read. With
+    # `indicators` the latest INDICATORS are added, computed once per chunk of `chunk_size`
+    # tickers over their aligned closes (as the batch path does over the whole panel), so
+    # memory is O(chunk) rather than O(universe).
+    tickers = list(tickers)
+    for start in range(0, len(tickers), chunk_size):
+        chunk = tickers[start:start + chunk_size]
+        closes = {ticker: price_cache.closes(ticker) for ticker in chunk}
+        latest = None
+        if indicators:
+            panel = pd.DataFrame({ticker: c for ticker, c in closes.items() if len(c)}, dtype=np.float64)
+            latest = latest_indicators(panel, benchmark_returns).to_dict('index')
+        for ticker in chunk:
+            try:
+                row = fundamentals_cache.get(ticker, fields=fields) if fields is None or fields else empty_fundamentals()
+            except Exception as e:
+                if failures is not None:
+                    failures[ticker] = f"{type(e).__name__}: {e}"
+                row = empty_fundamentals()
+            row.update(ticker_statistical_features(closes[ticker], benchmark_returns))
+            if latest is not None and ticker in latest:
+                row.update(latest[ticker])
+            row['ticker'] = ticker
+            yield row
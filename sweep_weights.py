@@ -0,0 +1,46 @@
+import itertools
+import sys
+import warnings
+
+import pandas as pd
+
+from screening_engine import ScreeningEngine, load_tickers
+from strategies import dip_bargains
+
+# Batch weight sweep for the dip screen: the universe is fetched and standardized once, then
+# every weight vector is scored in a single matrix product over the cached components.
+# Usage: python sweep_weights.py [weights.csv] -- one column per component (quality, value,
+# dip, off_high, sharpe, volatility), one row per weight vector. Without a file a grid is used.
+
+TICKERS_CSV = "sp500_tickers.csv"
+OUTPUT_CSV = "weight_sweep.csv"
+MAX_PE = 30
+TOP_N = 10
+
+GRID = {
+    'quality': [0.5, 1.0],
+    'value': [0.5, 1.0],
+    'dip': [0.0, 0.35, 0.7, 1.0],
+    'off_high': [0.0, 0.35, 0.7, 1.0],
+    'sharpe': [0.0, 0.5],
+    'volatility': [-0.5, -1.0, -1.5],
+}
+
+
+def weight_grid(grid=GRID):
+    return pd.DataFrame(list(itertools.product(*grid.values())), columns=list(grid))
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore", category=FutureWarning, module="yfinance")
+    weights = pd.read_csv(sys.argv[1]) if len(sys.argv) > 1 else weight_grid()
+    engine = ScreeningEngine(load_tickers(TICKERS_CSV))
+    try:
+        result = engine.run([dip_bargains(max_pe=MAX_PE)])["dip_bargains"]
+    finally:
+        engine.close()
+    picks = result.sweep(weights, top_n=TOP_N)
+    out = pd.concat([weights.reset_index(drop=True), picks], axis=1)
+    out.to_csv(OUTPUT_CSV, index=False)
+    print(f"Scored {len(weights)} weight vectors over {len(result.candidates)} candidates -> {OUTPUT_CSV}")
+    print(out.head(10).to_string(index=False))
@@ -0,0 +1,141 @@
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Synthetic universes for benchmarks and offline checks. Prices are geometric random walks
+# with a shared market factor, so betas and correlations look roughly like real equities.
+
+
+def synthetic_tickers(n_tickers):
+    return [f"T{i:05d}" for i in range(n_tickers)]
+
+
+def synthetic_close_panel(n_tickers, n_days=756, seed=0, missing=0.0, late_start=0.0, start="2022-01-03"):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=n_days, name="Date")
+    market = rng.normal(0.0003, 0.01, n_days)
+    betas = rng.uniform(0.5, 1.5, n_tickers)
+    idio = rng.normal(0.0002, 0.015, (n_days, n_tickers))
+    returns = market[:, None] * betas + idio
+    closes = 100 * np.cumprod(1 + returns, axis=0)
+    if missing:
+        closes[rng.random(closes.shape) < missing] = np.nan
+    if late_start:
+        # Some names only listed part way through the window (IPOs, spin-offs)
+        late = rng.random(n_tickers) < late_start
+        first = rng.integers(1, n_days, n_tickers)
+        rows = np.arange(n_days)[:, None]
+        closes[(rows < first) & late] = np.nan
+    return pd.DataFrame(closes, index=dates, columns=synthetic_tickers(n_tickers))
+
+
+def synthetic_benchmark_returns(close_panel, seed=1):
+    # Equal-weight index of the panel plus a little noise, as a stand-in for SPY
+    rng = np.random.default_rng(seed)
+    returns = close_panel.pct_change(fill_method=None).mean(axis=1).iloc[1:]
+    return returns + rng.normal(0, 0.001, len(returns))
+
+
+def synthetic_ticks(close_panel, rounds=10, seed=2, start="2025-01-02 09:30", tickers=None, volatility=0.003):
+    # Intraday last-price ticks after the panel's final close: `rounds` passes over the
+    # universe in shuffled order, each price a random walk from the ticker's last close
+    rng = np.random.default_rng(seed)
+    tickers = list(close_panel.columns if tickers is None else tickers)
+    last = close_panel[tickers].ffill().iloc[-1].to_numpy(dtype=np.float64)
+    paths = last * np.cumprod(1 + rng.normal(0, volatility, (rounds, len(tickers))), axis=0)
+    order = np.argsort(rng.random((rounds, len(tickers))), axis=1)
+    rows = np.repeat(np.arange(rounds), len(tickers))
+    columns = order.ravel()
+    times = pd.Timestamp(start) + pd.to_timedelta(np.arange(len(rows)) * 10, unit="ms")
+    ticks = pd.DataFrame({"timestamp": times, "ticker": np.asarray(tickers, dtype=object)[columns],
+                          "price": paths[rows, columns]})
+    return ticks[np.isfinite(ticks["price"].to_numpy())].reset_index(drop=True)
+
+
+SECTORS = ["Technology", "Financial Services", "Healthcare", "Industrials", "Consumer Cyclical",
+           "Energy", "Utilities", "Real Estate", "Basic Materials", "Communication Services"]
+
+
+def synthetic_info(ticker, seed=0):
+    # A Ticker.info-shaped dict; about 5% of names miss each field, as delisted/thin names do.
+    # Seeded from a hash of the whole symbol, so every ticker gets its own profile.
+    rng = np.random.default_rng([seed, zlib.crc32(ticker.encode())])
+    sector = SECTORS[rng.integers(len(SECTORS))]
+    info = {
+        "symbol": ticker, "sector": sector, "industry": f"{sector} {rng.integers(4)}",
+        "trailingPE": rng.uniform(4, 60), "returnOnEquity": rng.normal(0.15, 0.1),
+        "debtToEquity": rng.uniform(0, 250), "heldPercentInsiders": rng.uniform(0, 0.2),
+        "revenueGrowth": rng.normal(0.05, 0.1), "earningsGrowth": rng.normal(0.05, 0.25),
+    }
+    for key in list(info)[1:]:
+        if rng.random() < 0.05:
+            info[key] = None
+    return info
+
+
+class ReplayMarket:
+    """Offline stand-in for yfinance over a synthetic universe: `download` has yf.download's
+    signature and returns its ('Close', 'AAPL') MultiIndex layout (flat columns for a single
+    symbol with `flat_single`, like older releases; all-NaN columns for unknown symbols), and
+    `ticker(symbol).info` returns an info dict. Every call sleeps `latency` /
+    `info_latency` seconds to stand in for the network. Only closes are held in memory; the
+    other OHLCV fields are derived per request, so 20k-ticker universes stay affordable."""
+
+    def __init__(self, n_tickers, n_days=756, seed=0, latency=0.0, info_latency=0.0, flat_single=False,
+                 benchmark="SPY", missing=0.001, late_start=0.05):
+        closes = synthetic_close_panel(n_tickers, n_days, seed=seed, missing=missing, late_start=late_start)
+        spy = 100 * np.cumprod(1 + synthetic_benchmark_returns(closes, seed=seed + 1).reindex(closes.index).fillna(0))
+        self.tickers = list(closes.columns)
+        self.closes = closes.assign(**{benchmark: spy})
+        self.seed = seed
+        self.latency = latency
+        self.info_latency = info_latency
+        self.flat_single = flat_single
+        self.calls = 0
+        self.info_calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, tickers, period=None, interval="1d", progress=False, start=None, **kwargs):
+        return self.download(tickers, period=period, interval=interval, progress=progress, start=start, **kwargs)
+
+    def download(self, tickers, period=None, interval="1d", progress=False, start=None, **kwargs):
+        with self.lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+        closes = self.closes.reindex(columns=symbols)
+        if start is not None:
+            closes = closes[closes.index >= pd.Timestamp(start)]
+        elif period is not None and period.endswith("y"):
+            closes = closes[closes.index > closes.index.max() - pd.DateOffset(years=int(period[:-1]))]
+        c = closes.to_numpy()
+        wiggle = 1 + 0.005 * np.sin(np.arange(c.size).reshape(c.shape))
+        fields = {"Open": c * wiggle, "High": c * 1.01, "Low": c * 0.99, "Close": c,
+                  "Volume": np.where(np.isnan(c), np.nan, 1e6)}
+        if self.flat_single and len(symbols) == 1:
+            return pd.DataFrame({f: v[:, 0] for f, v in fields.items()}, index=closes.index)
+        columns = pd.MultiIndex.from_product([list(fields), symbols], names=["Price", "Ticker"])
+        return pd.DataFrame(np.hstack(list(fields.values())), index=closes.index, columns=columns)
+
+    def ticker(self, symbol):
+        return ReplayTicker(self, symbol)
+
+
+class ReplayTicker:
+    def __init__(self, market, symbol):
+        self.market = market
+        self.symbol = symbol
+
+    @property
+    def info(self):
+        with self.market.lock:
+            self.market.info_calls += 1
+        if self.market.info_latency:
+            time.sleep(self.market.info_latency)
+        if self.symbol not in self.market.closes.columns:
+            return {}
+        return synthetic_info(self.symbol, self.market.seed)
@@ -0,0 +1,789 @@
+import datetime as dt
+import json
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data import PRICE_FIELDS, BenchmarkProvider, CsvReplaySource, PriceLoader
+from backtest import LOOKBACK_DAYS, backtest, point_in_time_features, rebalance_dates, restrict
+from diversification import covariance, demeaned_returns, diversified_top, ledoit_wolf, mean_pairwise_correlation
+from feature_store import FeatureStore, load_snapshot, save_snapshot, snapshot_path
+from fetch_scheduler import FetchScheduler, TokenBucket
+from fundamentals_cache import FIELD_TTL, HOUR, MAX_IDLE, FundamentalsCache
+from grouped_scores import grouped_zscore
+from indicators import INDICATORS, IndicatorState, compute_indicators
+from intraday import LIVE_FEATURES, IntradayScreen, TickFile
+from parallel_features import parallel_price_features, price_features
+from price_cache import PriceCache
+from report_export import export_excel
+from screener_cli import build_parser
+from screener_cli import main as screener_main
+from screening_engine import ScreeningEngine, component_matrix, score_strategy
+from stats_engine import STAT_FEATURES, compute_statistical_features, ticker_statistical_features
+from strategies import STRATEGIES, dip_bargains, dip_technical, strongest_bets
+from streaming import cached_feature_rows, stream_top_n
+from synthetic_data import ReplayMarket, synthetic_benchmark_returns, synthetic_close_panel, synthetic_ticks
+
+# Offline checks: every data source here is a local fixture, so these run without network.
+
+
+def write_price_fixtures(directory, tickers, days=400, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=days, name="Date")
+    for ticker in tickers:
+        close = 100 * np.cumprod(1 + rng.normal(0.0004, 0.015, days))
+        data = pd.DataFrame({
+            "Open": close * 0.995, "High": close * 1.01, "Low": close * 0.99,
+            "Close": close, "Volume": rng.integers(1_000, 10_000, days).astype(float),
+        }, index=dates)
+        data.to_csv(directory / f"{ticker}.csv")
+    return dates
+
+
+def test_price_loader_builds_panel_from_chunks(tmp_path):
+    tickers = ["AAA", "BBB", "CCC", "DDD", "EEE"]
+    dates = write_price_fixtures(tmp_path, tickers)
+    source = CsvReplaySource(tmp_path)
+    panels = PriceLoader(chunk_size=2, fields=PRICE_FIELDS, download=source).load(tickers)
+    close = panels["Close"]
+    assert list(close.columns) == tickers
+    assert (close.dtypes == np.float64).all()
+    assert len(close) == len(dates)
+    expected = pd.read_csv(tmp_path / "CCC.csv", index_col="Date", parse_dates=True)["Close"]
+    np.testing.assert_allclose(close["CCC"].to_numpy(), expected.to_numpy())
+    assert source.calls == 3
+
+
+def test_price_loader_retries_missing_symbols_one_by_one(tmp_path):
+    write_price_fixtures(tmp_path, ["AAA", "BBB"])
+    source = CsvReplaySource(tmp_path)
+    loader = PriceLoader(chunk_size=3, download=source)
+    close = loader.load(["AAA", "GONE", "BBB"])["Close"]
+    assert loader.failed == ["GONE"]
+    assert close["GONE"].isna().all()
+    assert close["AAA"].notna().all() and close["BBB"].notna().all()
+    assert source.calls == 2
+
+
+def test_vectorized_statistics_match_per_ticker_path():
+    panel = synthetic_close_panel(120, missing=0.02, late_start=0.3, seed=3)
+    panel.iloc[:, 0] = np.nan          # no data at all
+    panel.iloc[:-40, 1] = np.nan       # too little history
+    panel.iloc[:, 2] = 50.0            # flat price, zero volatility
+    bench = synthetic_benchmark_returns(panel)
+    vectorized = compute_statistical_features(panel, bench)
+    reference = pd.DataFrame({t: ticker_statistical_features(panel[t], bench) for t in panel.columns}).T
+    np.testing.assert_allclose(vectorized.to_numpy(), reference[STAT_FEATURES].to_numpy(dtype=float),
+                               rtol=1e-9, atol=1e-12)
+    assert vectorized.iloc[:3].isna().all().all()
+
+
+def test_benchmark_provider_fetches_once_and_survives_failures(capsys):
+    market = ReplayMarket(20, n_days=300)
+    provider = BenchmarkProvider(download=market, scheduler=FetchScheduler(rate=1e6))
+    bench = provider.returns()
+    assert provider.returns() is bench and provider.fetch_count == 1 and market.calls == 1
+    pd.testing.assert_series_equal(bench, market.closes["SPY"].pct_change().dropna(), check_names=False)
+    panel = market.closes[market.tickers]
+    beta = compute_statistical_features(panel, bench)["beta"]
+    pairs = pd.concat([panel.iloc[:, 0].dropna().pct_change(), bench], axis=1).dropna().to_numpy()
+    assert beta.iloc[0] == pytest.approx(np.cov(pairs.T)[0, 1] / np.var(pairs[:, 1]), rel=1e-9)
+
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("connection reset")
+
+    scheduler = FetchScheduler(rate=1e6, max_retries=2, sleep=lambda seconds: None)
+    provider = BenchmarkProvider(download=unreachable, scheduler=scheduler)
+    assert provider.returns().empty and scheduler.retries == 2
+    assert compute_statistical_features(panel, provider.returns())["beta"].isna().all()
+    assert "Benchmark download failed (SPY)" in capsys.readouterr().out
+
+
+def test_price_cache_append_matches_cold_fetch(tmp_path):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    tickers = ["AAA", "BBB", "CCC"]
+    dates = write_price_fixtures(fixtures, tickers, days=300)
+    source = CsvReplaySource(fixtures, as_of=dates[279])
+    cache = PriceCache(tmp_path / "warm", years=1, download=source, today=dates[279].date())
+    cache.load(tickers)
+    assert cache.stats["cold"] == 3
+
+    source.as_of = cache.today = dates[-1].date()
+    warm = cache.load(tickers, fields=PRICE_FIELDS)
+    assert cache.stats == {"fresh": 0, "appended": 3, "cold": 0, "invalidated": 0}
+    calls = source.calls
+    cache.load(tickers)
+    assert cache.stats["fresh"] == 3 and source.calls == calls
+
+    cold = PriceCache(tmp_path / "cold", years=1, download=CsvReplaySource(fixtures), today=dates[-1].date())
+    expected = cold.load(tickers, fields=PRICE_FIELDS)
+    for field in PRICE_FIELDS:
+        pd.testing.assert_frame_equal(warm[field], expected[field])
+
+
+def test_replay_market_mimics_yfinance_shapes(tmp_path):
+    market = ReplayMarket(30, n_days=300, flat_single=True)
+    chunk = market.download(market.tickers[:3] + ["NOPE"], period="1y")
+    assert isinstance(chunk.columns, pd.MultiIndex) and chunk[("Close", "NOPE")].isna().all()
+    assert list(market.download(market.tickers[0], period="1y").columns) == list(PRICE_FIELDS)
+    assert market.ticker("NOPE").info == {} and "sector" in market.ticker(market.tickers[0]).info
+    assert len({tuple(market.ticker(t).info.values())[1:] for t in market.tickers}) == len(market.tickers)
+
+    loader = PriceLoader(fields=PRICE_FIELDS, chunk_size=7, download=market)
+    panels = loader.load(market.tickers[:10] + ["NOPE"])
+    assert loader.failed == ["NOPE"]
+    np.testing.assert_allclose(panels["Close"][market.tickers[:10]], market.closes[market.tickers[:10]]
+                               .loc[panels["Close"].index])
+
+    cache = PriceCache(tmp_path / "prices", download=market, today=dt.date(2023, 2, 20))
+    first = cache.load(market.tickers)["Close"]
+    records = cache.update(market.tickers)
+    assert cache.stats["fresh"] == 30 and len(records) == 30
+    pd.testing.assert_frame_equal(cache.panel(records, market.tickers, ["Close"])["Close"], first)
+
+
+def test_cli_cache_status_without_heavy_imports(tmp_path, capsys):
+    market = ReplayMarket(20, n_days=300)
+    caches = ["--price-cache", str(tmp_path / "prices"), "--fundamentals-cache", str(tmp_path / "f.sqlite")]
+    engine = ScreeningEngine(market.tickers, price_cache_dir=tmp_path / "prices",
+                             fundamentals_cache=tmp_path / "f.sqlite", requests_per_second=1e6,
+                             download=market, ticker_factory=market.ticker)
+    try:
+        engine.build_feature_matrix()
+    finally:
+        engine.close()
+    assert screener_main(caches + ["cache-status", "--json"]) == 0
+    status = json.loads(capsys.readouterr().out)
+    assert status["prices"]["tickers"] == 20 and status["fundamentals"]["tickers"] == 20
+    with pytest.raises(SystemExit):
+        screener_main(["screen", "--strategy", "dip_bargains", "--weight", "nope=1"])
+    watch = build_parser().parse_args(["watch", "--strategy", "strongest_bets", "--session", "2024-05-01"])
+    assert watch.session == dt.date(2024, 5, 1)
+
+    probe = ("import sys, screener_cli; screener_cli.main(%r); "
+             "print(sorted({'numpy', 'pandas', 'yfinance', 'screening_engine'} & set(sys.modules)))")
+    out = subprocess.run([sys.executable, "-c", probe % (caches + ["cache-status"])], capture_output=True, text=True,
+                         check=True).stdout
+    assert out.splitlines()[-1] == "[]"
+
+
+def test_price_cache_invalidates_adjusted_history(tmp_path):
+    dates = write_price_fixtures(tmp_path, ["AAA"], days=200)
+    source = CsvReplaySource(tmp_path, as_of=dates[189])
+    cache = PriceCache(tmp_path / "cache", download=source, today=dates[189].date())
+    cache.load(["AAA"])
+
+    # A 2-for-1 split: the adjusted history is halved on the next download
+    data = pd.read_csv(tmp_path / "AAA.csv", index_col="Date", parse_dates=True)
+    data[["Open", "High", "Low", "Close"]] /= 2
+    data.to_csv(tmp_path / "AAA.csv")
+    source.as_of = cache.today = dates[-1].date()
+    close = cache.load(["AAA"])["Close"]
+    assert cache.stats["invalidated"] == 1 and cache.stats["cold"] == 1
+    np.testing.assert_allclose(close["AAA"].to_numpy(), data["Close"].to_numpy())
+
+
+def test_price_cache_replaces_partial_session_bar(tmp_path):
+    dates = write_price_fixtures(tmp_path, ["AAA"], days=200)
+    day = dates[189]
+    final = pd.read_csv(tmp_path / "AAA.csv", index_col="Date", parse_dates=True)
+    partial = final.copy()
+    partial.loc[day, ["High", "Close"]] *= 1.02
+    partial.to_csv(tmp_path / "AAA.csv")
+    source = CsvReplaySource(tmp_path, as_of=day)
+    cache = PriceCache(tmp_path / "cache", download=source, today=day.date(),
+                       now=dt.datetime.combine(day.date(), dt.time(11, 30)))
+    assert cache.load(["AAA"])["Close"]["AAA"].iloc[-1] == partial.loc[day, "Close"]
+    assert cache.index["AAA"]["provisional"]
+
+    # Same evening, after the close: the partial bar is re-fetched and replaced, not invalidated
+    final.to_csv(tmp_path / "AAA.csv")
+    cache.now = dt.datetime.combine(day.date(), dt.time(17, 0))
+    close = cache.load(["AAA"])["Close"]["AAA"]
+    assert cache.stats == {"fresh": 0, "appended": 1, "cold": 0, "invalidated": 0}
+    assert close.iloc[-1] == final.loc[day, "Close"] and not cache.index["AAA"]["provisional"]
+    np.testing.assert_allclose(close.to_numpy(), final["Close"].iloc[:190].to_numpy())
+
+    # The next day's append sees a matching overlap
+    source.as_of = cache.today = dates[190].date()
+    cache.now = dt.datetime.combine(dates[190].date(), dt.time(18, 0))
+    close = cache.load(["AAA"])["Close"]["AAA"]
+    assert cache.stats["appended"] == 1 and cache.stats["invalidated"] == 0
+    np.testing.assert_allclose(close.to_numpy(), final["Close"].iloc[:191].to_numpy())
+
+
+def test_price_cache_fetches_the_close_after_a_morning_run(tmp_path):
+    dates = write_price_fixtures(tmp_path, ["AAA"], days=200)
+    day = dates[189].date()
+    # Before the open only the previous session is available; its bar is final
+    source = CsvReplaySource(tmp_path, as_of=dates[188])
+    cache = PriceCache(tmp_path / "cache", download=source, today=day, now=dt.datetime.combine(day, dt.time(8, 0)))
+    cache.load(["AAA"])
+    assert cache.index["AAA"]["last_date"] == str(dates[188].date()) and not cache.index["AAA"]["provisional"]
+
+    source.as_of, cache.now = dates[189], dt.datetime.combine(day, dt.time(18, 0))
+    close = cache.load(["AAA"])["Close"]["AAA"]
+    assert cache.stats["appended"] == 1 and close.index[-1] == dates[189]
+    calls = source.calls
+    cache.now = dt.datetime.combine(day, dt.time(20, 0))
+    cache.load(["AAA"])
+    assert cache.stats["fresh"] == 1 and source.calls == calls
+
+
+def test_price_cache_retries_failed_tail_download(tmp_path):
+    dates = write_price_fixtures(tmp_path, ["AAA", "BBB"], days=200)
+    source = CsvReplaySource(tmp_path, as_of=dates[189])
+    cache = PriceCache(tmp_path / "cache", download=source, today=dates[189].date())
+    cache.load(["AAA", "BBB"])
+    checked = cache.index["AAA"]["checked"]
+
+    # The next day's tail download for AAA comes back empty: the cached history is served
+    (tmp_path / "AAA.csv").rename(tmp_path / "AAA.bak")
+    source.as_of = cache.today = dates[190].date()
+    close = cache.load(["AAA", "BBB"])["Close"]
+    assert cache.failed == ["AAA"] and cache.stats["appended"] == 1
+    assert cache.index["AAA"]["checked"] == checked and close["AAA"].notna().sum() == 190
+
+    (tmp_path / "AAA.bak").rename(tmp_path / "AAA.csv")
+    close = cache.load(["AAA", "BBB"])["Close"]
+    assert cache.failed == [] and cache.stats == {"fresh": 1, "appended": 1, "cold": 0, "invalidated": 0}
+    assert close["AAA"].notna().sum() == 191
+
+
+class FakeTicker:
+    calls = 0
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    @property
+    def info(self):
+        FakeTicker.calls += 1
+        if self.ticker == "AAA":
+            return {"trailingPE": 18.5, "returnOnEquity": 0.21, "debtToEquity": 40.0,
+                    "heldPercentInsiders": 0.01, "revenueGrowth": 0.08, "earningsGrowth": None}
+        rng = np.random.default_rng(sum(map(ord, self.ticker)))
+        return {"trailingPE": rng.uniform(8, 28), "returnOnEquity": rng.normal(0.15, 0.1),
+                "debtToEquity": rng.uniform(0, 200), "heldPercentInsiders": rng.uniform(0, 0.1),
+                "revenueGrowth": rng.normal(0.05, 0.1), "earningsGrowth": rng.normal(0.05, 0.2),
+                "sector": ["Technology", "Energy"][rng.integers(2)], "industry": "Software"}
+
+
+def test_fundamentals_cache_respects_field_ttls(tmp_path):
+    now = [1_000_000.0]
+    FakeTicker.calls = 0
+    cache = FundamentalsCache(tmp_path / "f.sqlite", ticker_factory=FakeTicker, clock=lambda: now[0])
+    first = cache.get("AAA")
+    assert first["pe"] == 18.5 and np.isnan(first["eps_growth"]) and first["sector"] is None
+    now[0] += HOUR
+    assert cache.get("AAA")["roe"] == 0.21
+    assert FakeTicker.calls == 1
+    now[0] += FIELD_TTL["pe"]
+    assert cache.get("AAA", fields=["roe", "sector"])["pe"] == 18.5  # a stale field nobody asked for
+    assert FakeTicker.calls == 1
+    cache.get("AAA")
+    assert FakeTicker.calls == 2
+    cache.get("AAA", refresh=True)
+    assert FakeTicker.calls == 3
+    cache.close()
+
+    reopened = FundamentalsCache(tmp_path / "f.sqlite", ticker_factory=FakeTicker, clock=lambda: now[0])
+    reopened.get("AAA")
+    assert FakeTicker.calls == 3 and reopened.hits == 1
+
+
+def test_fundamentals_cache_evicts_least_recently_used(tmp_path):
+    now = [0.0]
+    cache = FundamentalsCache(tmp_path / "f.sqlite", max_tickers=2, ticker_factory=FakeTicker, clock=lambda: now[0])
+    for ticker in ["OLD", "AAA", "BBB"]:
+        now[0] += 1
+        cache.get(ticker)
+    assert cache.evict() == ["OLD"]
+    assert cache.get("BBB")["sector"] in ("Technology", "Energy") and cache.hits == 1
+    kinds = dict(cache._db.execute("SELECT field, typeof(value) FROM fundamentals WHERE ticker = 'BBB'"))
+    assert kinds["sector"] == "text" and kinds["pe"] == "real"
+
+    # A delisted symbol nobody reads any more ages out even under the size bound
+    cache.max_tickers = 10
+    now[0] += MAX_IDLE
+    cache.get("BBB")
+    assert cache.evict() == ["AAA"]
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class FakeProvider:
+    # Injects latency, a burst of throttling errors per ticker and a permanent failure
+    def __init__(self, throttle_times=1, broken=("BAD",)):
+        self.throttle_times = throttle_times
+        self.broken = set(broken)
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def fetch(self, ticker):
+        with self.lock:
+            self.calls[ticker] = self.calls.get(ticker, 0) + 1
+            attempt = self.calls[ticker]
+        time.sleep(0.01 * (hash(ticker) % 3))
+        if ticker in self.broken:
+            raise KeyError(ticker)
+        if attempt <= self.throttle_times:
+            raise RateLimitError("Too Many Requests. Rate limited.")
+        return {"ticker": ticker, "attempt": attempt}
+
+
+def test_fetch_scheduler_orders_results_and_reports_failures():
+    provider = FakeProvider()
+    scheduler = FetchScheduler(max_workers=6, rate=1000, burst=1000, backoff=0.001)
+    tickers = [f"T{i}" for i in range(20)] + ["BAD"]
+    results = scheduler.map(scheduler.throttled(provider.fetch), tickers)
+    assert [r["ticker"] for r in results[:-1]] == tickers[:-1]
+    assert all(r["attempt"] == 2 for r in results[:-1])
+    assert results[-1] is None
+    assert list(scheduler.failures) == ["BAD"] and provider.calls["BAD"] == 1
+    assert scheduler.retries == 20
+
+
+def test_token_bucket_limits_request_rate():
+    bucket = TokenBucket(rate=200, burst=1)
+    start = time.perf_counter()
+    for _ in range(21):
+        bucket.acquire()
+    assert time.perf_counter() - start >= 0.09
+
+
+def synthetic_features(n=200, seed=5):
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame({
+        "ticker": [f"T{i}" for i in range(n)],
+        "pe": rng.uniform(5, 60, n), "roe": rng.normal(0.15, 0.1, n), "debt_equity": rng.uniform(0, 200, n),
+        "insider_own": rng.uniform(0, 0.2, n), "revenue_growth": rng.normal(0.05, 0.1, n),
+        "eps_growth": rng.normal(0.05, 0.2, n), "volatility": rng.uniform(0.15, 0.6, n),
+        "sharpe": rng.normal(0.6, 0.4, n), "momentum_1m": rng.normal(0, 0.08, n),
+        "momentum_3m": rng.normal(0, 0.15, n), "drawdown": -rng.uniform(0.05, 0.6, n), "beta": rng.normal(1, 0.3, n),
+        "rsi_14": rng.uniform(15, 85, n), "sma_gap_50": rng.normal(0, 0.08, n),
+    })
+    features.loc[rng.random(n) < 0.1, "pe"] = np.nan
+    features["sector"] = rng.choice(["Technology", "Financial Services", "Energy", "Utilities", None], n)
+    return features
+
+
+def test_dip_strategy_matches_v8_script_scoring():
+    features = synthetic_features()
+    # Scoring exactly as screening_v8.py did it before the engine existed
+    df = features.dropna(subset=['sharpe', 'volatility', 'pe', 'roe', 'revenue_growth', 'eps_growth',
+                                 'momentum_1m', 'momentum_3m', 'drawdown'])
+    df = df[df['pe'] < 30].copy()
+    df['quality'] = df[['roe', 'revenue_growth', 'eps_growth']].apply(lambda x: (x - x.mean()) / x.std()).sum(axis=1)
+    df['value'] = -((df['pe'] - df['pe'].mean()) / df['pe'].std())
+    df['dip'] = -((df['momentum_1m'] + df['momentum_3m']) / 2)
+    df['off_high'] = -df['drawdown']
+    df['score'] = (df['quality'] + df['value'] + 0.7 * df['dip'] + 0.7 * df['off_high']
+                   + 0.5 * df['sharpe'] - 1.0 * df['volatility'])
+
+    result = score_strategy(features, dip_bargains())
+    np.testing.assert_allclose(result.candidates['score'], df['score'], rtol=1e-12)
+    assert result.top['ticker'].tolist() == df.sort_values('score', ascending=False).head(10)['ticker'].tolist()
+
+
+def fixture_engine(tmp_path, n_tickers=12, **kwargs):
+    # An engine over CSV price fixtures (plus SPY) and FakeTicker fundamentals
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    tickers = [f"T{i}" for i in range(n_tickers)]
+    write_price_fixtures(fixtures, tickers + ["SPY"])
+    source = CsvReplaySource(fixtures)
+    FakeTicker.calls = 0
+    engine = ScreeningEngine(tickers, price_cache_dir=tmp_path / "prices", fundamentals_cache=tmp_path / "f.sqlite",
+                             download=source, ticker_factory=FakeTicker, requests_per_second=1000, **kwargs)
+    return engine, source
+
+
+def test_engine_runs_all_strategies_from_one_fetch(tmp_path):
+    engine, source = fixture_engine(tmp_path)
+    results = engine.run([factory() for factory in STRATEGIES.values()])
+    engine.close()
+    assert set(results) == set(STRATEGIES)
+    assert all(len(r.candidates) for r in results.values())
+    assert source.calls == 2  # one price chunk + one SPY download
+    assert FakeTicker.calls == len(engine.tickers)
+
+
+def test_engine_run_profile_records_stages_calls_and_drops(tmp_path):
+    engine, _ = fixture_engine(tmp_path)
+    results = engine.run([factory() for factory in STRATEGIES.values()])
+    engine.close()
+    profile = engine.run_profile()
+    assert {"prices", "benchmark", "price_features", "fundamentals", "score:dip_bargains"} <= set(profile["stages"])
+    assert profile["calls"]["info"]["count"] == len(engine.tickers)
+    assert profile["calls"]["price_download"]["count"] == 1
+    assert profile["counters"]["fundamentals_cache"]["hit_ratio"] == 0.0  # a cold cache: every ticker missed
+    pe_filter = [d for d in profile["drops"] if d["strategy"] == "dip_bargains" and d["step"] == "pe < 30"]
+    assert pe_filter[0]["rows_in"] - pe_filter[0]["dropped"] == len(results["dip_bargains"].candidates)
+    json.loads(open(engine.write_profile(tmp_path / "profile.json")).read())
+
+
+def test_engine_fetches_only_the_fundamentals_strategies_read(tmp_path):
+    market = ReplayMarket(30, n_days=300)
+    engine = ScreeningEngine(market.tickers, price_cache_dir=tmp_path / "prices",
+                             fundamentals_cache=tmp_path / "f.sqlite", requests_per_second=1e6,
+                             download=market, ticker_factory=market.ticker)
+    try:
+        engine.run([strongest_bets()])
+        assert market.info_calls == 0 and "fundamentals" not in engine.profile.stages
+        assert engine.features['pe'].isna().all()
+        result = engine.run([dip_bargains()])['dip_bargains']
+        assert market.info_calls == 30 and len(result.candidates)
+        engine.run([strongest_bets(), dip_bargains()])
+        assert market.info_calls == 30 and engine.profile.stages["fundamentals"]["runs"] == 1
+    finally:
+        engine.close()
+
+
+def test_sector_relative_scores_match_groupby():
+    features = synthetic_features(600, seed=3)
+    features.loc[features.index[:2], "sector"] = "Tiny"  # below MIN_GROUP_SIZE: universe z-score
+    pe = features["pe"]
+    expected = pe.groupby(features["sector"]).transform(lambda x: (x - x.mean()) / x.std())
+    fallback = features["sector"].isna() | (features["sector"] == "Tiny")
+    expected[fallback] = ((pe - pe.mean()) / pe.std())[fallback]
+    np.testing.assert_allclose(grouped_zscore(pe, features["sector"]), expected, rtol=1e-12)
+
+    ranked = grouped_zscore(pe, features["sector"], "rank")
+    assert np.nanmax(np.abs(ranked)) <= np.sqrt(3) + 1e-12
+    winsorized = grouped_zscore(pe, features["sector"], "winsor")
+    assert np.nanmax(np.abs(winsorized)) <= np.nanmax(np.abs(expected))
+
+    result = score_strategy(features, STRATEGIES["dip_bargains_sector"]())
+    candidates = result.candidates
+    value = -grouped_zscore(candidates["pe"], candidates["sector"])
+    np.testing.assert_allclose(result.components["value"], value, rtol=1e-12)
+    assert result.top.columns[1] == "sector"
+
+
+def test_feature_store_round_trips_through_memory_map(tmp_path):
+    features = synthetic_features(500, seed=8)
+    store = FeatureStore.from_frame(features, categories=["sector"], dtypes={"insider_own": np.float32})
+    rows = FeatureStore.from_records(features['ticker'], features.to_dict('records'), list(store.columns), ["sector"])
+    required = dip_bargains().required
+    np.testing.assert_array_equal(store.valid(required), features[required].notna().all(axis=1))
+    np.testing.assert_array_equal(rows.mask, store.mask)
+
+    path = save_snapshot(store, tmp_path, "2026-01-02")
+    loaded = load_snapshot(tmp_path)
+    assert isinstance(loaded.columns['pe'], np.memmap) or isinstance(loaded.columns['pe'].base, np.memmap)
+    frame = loaded.to_frame()
+    assert np.shares_memory(frame['pe'].to_numpy(), loaded.columns['pe'])
+    assert frame['insider_own'].dtype == np.float32
+    pd.testing.assert_frame_equal(frame.drop(columns=['sector', 'insider_own']),
+                                  features.drop(columns=['sector', 'insider_own']))
+    assert frame['sector'].astype(object).fillna("").tolist() == features['sector'].fillna("").tolist()
+    assert loaded.index['T42'] == 42 and path == snapshot_path(tmp_path, "2026-01-02")
+    assert score_strategy(frame, dip_bargains()).top['ticker'].tolist() == \
+        score_strategy(features, dip_bargains()).top['ticker'].tolist()
+
+
+def test_engine_scores_a_saved_snapshot_without_fetching(tmp_path):
+    engine, source = fixture_engine(tmp_path, snapshot_dir=tmp_path / "snapshots")
+    expected = engine.run([dip_bargains()])['dip_bargains'].top['ticker'].tolist()
+    engine.close()
+    calls = source.calls
+    replay = ScreeningEngine(engine.tickers, price_cache_dir=tmp_path / "prices",
+                             fundamentals_cache=tmp_path / "f.sqlite", download=source, ticker_factory=FakeTicker)
+    try:
+        replay.use_store(load_snapshot(tmp_path / "snapshots"))
+        assert replay.run([dip_bargains()])['dip_bargains'].top['ticker'].tolist() == expected
+        # Price-based views read the cached closes instead of a panel from a build
+        assert len(replay.diversify('dip_bargains')) == len(expected)
+        assert replay.intraday('dip_bargains').top()['ticker'].tolist() == expected
+    finally:
+        replay.close()
+    assert source.calls == calls and FakeTicker.calls == len(engine.tickers)
+    empty = ScreeningEngine(engine.tickers, price_cache_dir=tmp_path / "none", fundamentals_cache=tmp_path / "g.sqlite")
+    empty.use_store(load_snapshot(tmp_path / "snapshots"))
+    empty.run([dip_bargains()])
+    with pytest.raises(ValueError, match="No cached prices"):
+        empty.diversify('dip_bargains')
+    empty.close()
+
+
+def test_rescore_and_sweep_match_full_rescoring():
+    features = synthetic_features(400)
+    result = score_strategy(features, dip_bargains())
+    weights = [dict(result.strategy.score_weights, dip=d, volatility=v) for d in (0.0, 0.7, 2.0) for v in (-0.5, -2)]
+    picks = result.sweep(weights, top_n=15)
+    for i, w in enumerate(weights):
+        strategy = dip_bargains()
+        strategy.score_weights = w
+        strategy.top_n = 15
+        expected = score_strategy(features, strategy).candidates.sort_values('score', ascending=False)
+        assert picks.iloc[i].tolist() == expected['ticker'].head(15).tolist()
+
+    result.rescore(weights[-1])
+    assert result.top['ticker'].tolist() == picks.iloc[-1].head(10).tolist()
+
+
+def test_streaming_top_n_matches_batch():
+    features = synthetic_features(1000, seed=9)
+    for name, factory in STRATEGIES.items():
+        if name.endswith("_sector"):
+            continue  # group-relative terms are batch-only
+        batch = score_strategy(features, factory()).top
+        streamed, count = stream_top_n(lambda: features.to_dict('records'), factory())
+        assert streamed['ticker'].tolist() == batch['ticker'].tolist()
+        np.testing.assert_allclose(streamed['score'], batch['score'], rtol=1e-9)
+        assert count == len(score_strategy(features, factory()).candidates)
+
+
+def test_cached_feature_rows_compute_indicators_per_chunk(tmp_path):
+    market = ReplayMarket(40, n_days=400)
+    engine = ScreeningEngine(market.tickers, price_cache_dir=tmp_path / "prices",
+                             fundamentals_cache=tmp_path / "f.sqlite", requests_per_second=1e6,
+                             download=market, ticker_factory=market.ticker)
+    try:
+        features = engine.build_feature_matrix(fields=()).set_index('ticker')
+        benchmark = engine.benchmarks.returns()
+        rows = list(cached_feature_rows(market.tickers, engine.price_cache, engine.fundamentals_cache, benchmark,
+                                        fields=(), chunk_size=7))
+        np.testing.assert_allclose(pd.DataFrame(rows).set_index('ticker')[INDICATORS], features[INDICATORS],
+                                   rtol=1e-9)
+        rows = cached_feature_rows(market.tickers, engine.price_cache, engine.fundamentals_cache, benchmark,
+                                   fields=(), indicators=False)
+        assert not any(set(INDICATORS) & set(row) for row in rows)
+        streamed = engine.stream(dip_technical())
+        assert streamed['ticker'].tolist() == engine.run([dip_technical()])['dip_technical'].top['ticker'].tolist()
+    finally:
+        engine.close()
+    assert market.info_calls == len(market.tickers)  # only dip_technical reads fundamentals
+
+
+def test_engine_stream_matches_run(tmp_path):
+    engine, _ = fixture_engine(tmp_path)
+    try:
+        expected = engine.run([strongest_bets()])['strongest_bets'].top
+        streamed = engine.stream(strongest_bets())
+    finally:
+        engine.close()
+    assert streamed['ticker'].tolist() == expected['ticker'].tolist()
+    np.testing.assert_allclose(streamed['score'], expected['score'], rtol=1e-9)
+
+
+def generated_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    for i in range(n):
+        yield {"ticker": f"T{i}", "pe": rng.uniform(5, 40), "roe": rng.normal(0.15, 0.1),
+               "revenue_growth": rng.normal(0.05, 0.1), "eps_growth": rng.normal(0.05, 0.2),
+               "volatility": rng.uniform(0.15, 0.6), "sharpe": rng.normal(0.6, 0.4),
+               "momentum_1m": rng.normal(0, 0.08), "momentum_3m": rng.normal(0, 0.15), "drawdown": -rng.uniform(0, 0.6)}
+
+
+def test_streaming_memory_stays_flat():
+    peaks = []
+    for n in (1_000, 10_000):
+        tracemalloc.start()
+        stream_top_n(lambda: generated_rows(n), dip_bargains())
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < 1.5 * peaks[0]
+
+
+def test_parallel_price_features_match_single_process():
+    panel = synthetic_close_panel(90, n_days=500, missing=0.01, late_start=0.1, seed=12)
+    bench = synthetic_benchmark_returns(panel)
+    expected = price_features(panel, bench)
+    parallel = parallel_price_features(panel, bench, workers=2, blocks=7)
+    pd.testing.assert_frame_equal(parallel, expected, check_exact=True)
+
+
+def test_diversified_top_n_avoids_correlated_clusters():
+    rng = np.random.default_rng(21)
+    dates = pd.bdate_range("2023-01-02", periods=300)
+    factors = rng.normal(0, 0.01, (300, 4))
+    cluster = np.repeat(np.arange(4), 10)  # 40 tickers, 4 tightly correlated clusters of 10
+    returns = factors[:, cluster] + rng.normal(0, 0.002, (300, 40))
+    tickers = [f"C{c}_{i}" for i, c in enumerate(cluster)]
+    panel = pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=dates, columns=tickers)
+    features = pd.DataFrame({"ticker": tickers, "sharpe": np.where(cluster == 0, 2.0, 1.0) + rng.normal(0, 0.1, 40),
+                             "volatility": rng.uniform(0.15, 0.3, 40)})
+    result = score_strategy(features, strongest_bets(risk_aversion=0.0))
+    result.strategy.top_n = 4
+    assert {t.split("_")[0] for t in result.top['ticker']} == {"C0"}
+    diversified = diversified_top(result, panel, penalty=5.0)
+    assert sorted(t.split("_")[0] for t in diversified['ticker']) == ["C0", "C1", "C2", "C3"]
+    assert diversified['ticker'].iloc[0] == result.top['ticker'].iloc[0]
+    assert mean_pairwise_correlation(panel, diversified['ticker']) < mean_pairwise_correlation(panel, result.top['ticker'])
+
+    x = demeaned_returns(panel, tickers)
+    np.testing.assert_allclose(covariance(x), np.cov(x, rowvar=False), rtol=1e-10)
+    shrunk, intensity = ledoit_wolf(x)
+    assert 0 < intensity < 1 and np.all(np.linalg.eigvalsh(shrunk) > 0)
+
+
+def test_intraday_ticks_match_batch_rescoring(tmp_path):
+    market = ReplayMarket(150, n_days=300)
+    engine = ScreeningEngine(market.tickers, price_cache_dir=tmp_path / "prices",
+                             fundamentals_cache=tmp_path / "f.sqlite", requests_per_second=1e6,
+                             download=market, ticker_factory=market.ticker)
+    try:
+        result = engine.run([dip_bargains()])["dip_bargains"]
+    finally:
+        engine.close()
+    events = []
+    live = engine.intraday("dip_bargains", top_n=5, publish=events.append)
+    members = set(live.top()['ticker'])
+    ticks = synthetic_ticks(engine.close_panel, rounds=15, volatility=0.1)
+    ticks.to_csv(tmp_path / "ticks.csv", index=False)
+    live.run(TickFile(tmp_path / "ticks.csv", chunksize=500))
+    assert live.ticks == ticks['ticker'].isin(live.tickers).sum() and live.report()["latency"]["count"] == len(ticks)
+
+    # The live features are the batch statistics with the last tick appended as a new day
+    last = ticks.groupby('ticker')['price'].last().reindex(engine.close_panel.columns)
+    today = pd.DataFrame([last.to_numpy()], columns=engine.close_panel.columns,
+                         index=[engine.close_panel.index[-1] + pd.Timedelta(days=1)])
+    stats = compute_statistical_features(pd.concat([engine.close_panel, today]))
+    candidates = result.candidates.copy()
+    for column in LIVE_FEATURES:
+        np.testing.assert_allclose(live.live[column], stats.loc[live.tickers, column], rtol=1e-9)
+        candidates[column] = live.live[column]
+    expected = component_matrix(candidates, result.strategy).to_numpy() @ result.weight_vector(
+        result.strategy.score_weights)
+    np.testing.assert_allclose(live.scores, expected, rtol=1e-9)
+    assert list(live.top()['ticker']) == [live.tickers[i] for i in np.argsort(-expected)[:5]]
+
+    # Replaying the published changes reproduces the final top-N
+    assert events and len(events) == live.changes
+    for event in events:
+        members = (members - {event["left"]}) | {event["entered"]}
+    assert members == set(live.top()['ticker']) == {t for t, _ in events[-1]["top"]}
+
+    # Run during market hours: the panel already ends with today's partial bar, which the
+    # ticks replace instead of following
+    session = today.index[0]
+    partial = pd.concat([engine.close_panel, today * 1.03])
+    replay = IntradayScreen(result, partial, top_n=5, session=session.date()).run(ticks.itertuples(index=False))
+    for column in LIVE_FEATURES:
+        np.testing.assert_allclose(replay.live[column], live.live[column], rtol=1e-12)
+    np.testing.assert_allclose(replay.scores, live.scores, rtol=1e-12)
+
+
+def test_incremental_indicators_match_full_history():
+    panel = synthetic_close_panel(60, n_days=400, missing=0.01, late_start=0.2, seed=4)
+    bench = synthetic_benchmark_returns(panel).reindex(panel.index)
+    full = compute_indicators(panel, bench)
+    state = IndicatorState.from_panel(panel.iloc[:-15], bench)
+    for day in range(len(panel) - 15, len(panel)):
+        state.update(panel.iloc[day].to_numpy(), bench.iloc[day])
+    latest = state.latest()
+    for name in INDICATORS:
+        np.testing.assert_allclose(latest[name].to_numpy(), full[name].iloc[-1].to_numpy(), rtol=1e-8)
+
+    closes = panel.ffill()
+    returns = closes.pct_change(fill_method=None)
+    np.testing.assert_allclose(full["volatility_63"], returns.rolling(63).std() * np.sqrt(252), rtol=1e-8)
+    np.testing.assert_allclose(full["sma_gap_50"], closes / closes.rolling(50).mean() - 1, rtol=1e-8)
+
+
+def test_engine_screens_when_every_download_comes_back_empty(tmp_path):
+    market = ReplayMarket(10, n_days=300)
+    engine = ScreeningEngine(market.tickers, price_cache_dir=tmp_path / "prices",
+                             fundamentals_cache=tmp_path / "f.sqlite", requests_per_second=1e6,
+                             download=lambda *args, **kwargs: pd.DataFrame(), ticker_factory=market.ticker)
+    try:
+        results = engine.run([factory() for factory in STRATEGIES.values()])
+    finally:
+        engine.close()
+    assert all(result.candidates.empty for result in results.values())
+    assert engine.features[INDICATORS].isna().all().all()
+
+
+def test_excel_report_streams_summary_and_ohlcv_sheets(tmp_path):
+    pytest.importorskip("openpyxl")  # to read the workbook back
+    market = ReplayMarket(8, n_days=300)
+    panels = {f: market.download(market.tickers, period="3y")[f] for f in PRICE_FIELDS}
+    features = pd.DataFrame({"ticker": market.tickers, "pe": np.arange(8.0), "sector": ["Energy", None] * 4})
+    path = export_excel(tmp_path / "report.xlsx", features, panels, market.tickers[::-1], ohlcv_sheets=3)
+    sheets = pd.read_excel(path, sheet_name=None)
+    assert list(sheets) == ["Summary", "Close History"] + [f"{t} OHLCV" for t in market.tickers[::-1][:3]]
+    assert sheets["Summary"]["Ticker"].tolist() == market.tickers[::-1]
+    ohlcv = sheets[f"{market.tickers[-1]} OHLCV"]
+    np.testing.assert_allclose(ohlcv["Close"], panels["Close"][market.tickers[-1]].to_numpy())
+
+
+def test_engine_export_writes_the_top_n_and_its_prices(tmp_path):
+    engine, _ = fixture_engine(tmp_path)
+    top = engine.run([dip_bargains()])['dip_bargains'].top
+    engine.close()
+    summary_csv, prices_csv = engine.export(tmp_path / "export", "dip_bargains")
+    summary = pd.read_csv(summary_csv)
+    assert summary["Ticker"].tolist() == top["ticker"].tolist()
+    np.testing.assert_allclose(summary["Score"], top["score"])
+    prices = pd.read_csv(prices_csv, parse_dates=["Date"])
+    first = summary["Ticker"].iloc[0]
+    closes = prices[prices["Ticker"] == first].set_index("Date")["Close"]
+    np.testing.assert_allclose(closes, engine.close_panel[first].dropna().loc[closes.index])
+
+
+def test_backtest_is_point_in_time_and_matches_batch_scoring():
+    panel = synthetic_close_panel(80, n_days=700, late_start=0.1, seed=6)
+    result = backtest(panel, frequency="monthly", top_n=5)
+    assert len(result.periods) == len(rebalance_dates(panel.index))
+    assert result.periods['turnover'].dropna().between(0, 1).all()
+    assert result.summary()["periods"] == len(result.periods) - 1
+
+    # Scrambling prices after a rebalance date cannot change the picks made on it
+    date = result.picks.index[5]
+    future = panel.copy()
+    future.loc[future.index > date] *= np.random.default_rng(0).uniform(0.5, 1.5, future.loc[future.index > date].shape)
+    assert backtest(future, top_n=5).picks.loc[date].tolist() == result.picks.loc[date].tolist()
+
+    # The vectorized per-date scoring agrees with the engine's score_strategy on that date
+    daily = point_in_time_features(panel)
+    features = pd.DataFrame({k: v.loc[date] for k, v in daily.items()}).rename_axis('ticker').reset_index()
+    strategy = restrict(dip_bargains(), daily)
+    strategy.top_n = 5
+    assert score_strategy(features, strategy).top['ticker'].tolist() == result.picks.loc[date].tolist()
+
+
+def test_backtest_takes_price_features_point_in_time():
+    panel = synthetic_close_panel(60, n_days=700, seed=7)
+    panel.iloc[:40, :10] *= np.linspace(2.0, 1.0, 40)[:, None]  # an early crash outside the window
+    dates = rebalance_dates(panel.index)
+    features = point_in_time_features(panel, dates=dates)
+    date = dates[4]
+    window = panel.loc[:date].iloc[-LOOKBACK_DAYS:]
+    np.testing.assert_allclose(features["drawdown"].loc[date], compute_statistical_features(window)["drawdown"])
+    strategy = restrict(dip_technical(), features)
+    assert {'oversold', 'below_trend'} <= set(strategy.components)
+
+    # Only fundamental columns of a snapshot are broadcast; today's indicators are not
+    snapshot = pd.DataFrame({"pe": np.random.default_rng(1).uniform(5, 40, 60), "rsi_14": 50.0,
+                             "sma_gap_50": 0.0}, index=panel.columns)
+    picks = backtest(panel, dip_technical(), snapshot, top_n=5).picks
+    snapshot[["rsi_14", "sma_gap_50"]] = np.random.default_rng(2).normal(size=(60, 2))
+    pd.testing.assert_frame_equal(backtest(panel, dip_technical(), snapshot, top_n=5).picks, picks)
+
+
+def test_backtest_drops_delisted_names_after_their_last_close():
+    panel = synthetic_close_panel(40, n_days=700, seed=8)
+    dates = rebalance_dates(panel.index)
+    delisted = panel.columns[:10]
+    last_close = panel.index[panel.index.get_loc(dates[3]) + 5]
+    panel.loc[panel.index > last_close, delisted] = np.nan
+    result = backtest(panel, top_n=5)
+
+    # The period they delist in keeps the move to the last close; later ones leave them out
+    closes = panel.ffill().loc[dates]
+    forward = (closes.shift(-1) / closes - 1).iloc[:-1]
+    forward.loc[forward.index > last_close, delisted] = np.nan
+    np.testing.assert_allclose(result.periods['universe_return'].iloc[:-1], forward.mean(axis=1))
+    later = result.picks.loc[result.picks.index > last_close]
+    assert not later.isin(delisted).any().any()